@@ -7,9 +7,15 @@ import pytesseract
 from PIL import Image, ImageGrab
 import time
 import threading
+import queue
 from collections import deque
 import random
 
+from vision2048 import AutoPlayer, FrameTracker, GlyphCache, TileClassifier, binarize, glyph_hash
+
+# 调色板中的方块数值
+TILE_VALUES = [0] + [2 ** k for k in range(1, 12)]
+
 class Game2048Assistant:
     def __init__(self, root):
         self.root = root
@@ -29,6 +35,19 @@ class Game2048Assistant:
         # AI相关
         self.directions = ['UP', 'DOWN', 'LEFT', 'RIGHT']
         
+        # 按格子背景色识别方块，参考颜色取自界面调色板，颜色未知时才使用OCR
+        # 调色板以外的数值共用一个默认色，不能按颜色区分
+        self.classifier = TileClassifier({value: self.get_color_by_value(value) for value in TILE_VALUES},
+                                         shared_colors=[self.get_color_by_value(None)])
+        # OCR识别过的字形按感知哈希保存在本地，同样的字形不再调用OCR
+        self.glyph_cache = GlyphCache()
+        self.ocr_calls = 0
+        # 与上一帧比较，只重新识别像素有变化的格子
+        self.tracker = FrameTracker(self.classifier)
+        # 自动模式的流水线及其发给界面线程的事件
+        self.auto_player = None
+        self.auto_events = queue.Queue()
+        
         self.setup_ui()
         
     def setup_ui(self):
@@ -65,6 +84,13 @@ class Game2048Assistant:
         self.auto_btn = tk.Button(control_frame, text="自动模式", command=self.toggle_auto_mode)
         self.auto_btn.pack(side=tk.LEFT, padx=5)
         
+        # 自动模式每秒最多移动的次数
+        tk.Label(control_frame, text="每秒最多").pack(side=tk.LEFT)
+        self.max_rate_var = tk.DoubleVar(value=4.0)
+        tk.Spinbox(control_frame, from_=0.5, to=20, increment=0.5, width=4,
+                   textvariable=self.max_rate_var).pack(side=tk.LEFT)
+        tk.Label(control_frame, text="步").pack(side=tk.LEFT)
+        
         # 坐标显示
         coord_frame = tk.LabelFrame(self.root, text="游戏区域坐标", padx=10, pady=10)
         coord_frame.pack(fill="x", padx=10, pady=5)
@@ -146,12 +172,16 @@ class Game2048Assistant:
             )
             
             self.start_btn.config(state=tk.NORMAL)
+            self.tracker.reset()
             self.log(f"已选择游戏区域: {self.game_region}")
         else:
             self.log("未选择有效区域")
             
     def start_recognition(self):
         """开始识别游戏状态"""
+        # 自动模式下识别线程正在使用识别状态（FrameTracker等），不能同时手动识别
+        if self.is_auto_mode:
+            return
         if not self.game_region:
             messagebox.showerror("错误", "请先选择游戏区域")
             return
@@ -164,41 +194,50 @@ class Game2048Assistant:
         except Exception as e:
             self.log(f"识别失败: {str(e)}")
             
-    def recognize_game_board(self):
-        """通过OCR识别游戏板"""
-        # 截取游戏区域
-        screenshot = ImageGrab.grab(bbox=self.game_region)
-        screenshot = screenshot.convert('L')  # 转为灰度图
-        screenshot = screenshot.point(lambda x: 0 if x < 128 else 255, '1')  # 二值化
-        
-        width, height = screenshot.size
-        cell_width = width // 4
-        cell_height = height // 4
-        
-        # 识别每个单元格
-        for i in range(4):
-            for j in range(4):
-                # 计算单元格区域
-                left = j * cell_width + 10
-                top = i * cell_height + 10
-                right = (j + 1) * cell_width - 10
-                bottom = (i + 1) * cell_height - 10
-                
-                # 裁剪单元格
-                cell_image = screenshot.crop((left, top, right, bottom))
-                
-                # OCR识别
-                text = pytesseract.image_to_string(cell_image, config='--psm 10')
-                # 清理识别结果
-                text = text.strip().replace('\n', '')
-                
-                # 转换为数字
-                try:
-                    value = int(text) if text.isdigit() else 0
-                except:
-                    value = 0
-                    
-                self.game_board[i][j] = value
+    def grab_frame(self):
+        """截取游戏区域，返回 H x W x 3 数组"""
+        return np.asarray(ImageGrab.grab(bbox=self.game_region).convert('RGB'))
+        
+    def recognize_game_board(self, frame=None):
+        """识别游戏板：只重新识别与上一帧相比有变化的格子，
+        按格子背景色分类，颜色未知的格子用OCR识别"""
+        if frame is None:
+            frame = self.grab_frame()
+        
+        self.ocr_calls = 0
+        self.game_board, changed = self.tracker.update(frame, fallback=self.read_cell)
+        unknown = self.tracker.fallbacks
+        if unknown:
+            self.log(f"{unknown}个格子颜色未知，其中{self.ocr_calls}个使用OCR识别")
+        return frame
+            
+    def read_cell(self, cell):
+        """识别颜色未知的格子：先查字形缓存，没见过的字形才使用OCR"""
+        key = glyph_hash(cell)
+        if not key:
+            return 0  # 没有数字笔画
+        value = self.glyph_cache.lookup(key)
+        if value is None:
+            self.ocr_calls += 1
+            value = self.ocr_cell(cell)
+            self.glyph_cache.add(key, value)
+        return value
+        
+    def ocr_cell(self, cell):
+        """通过OCR识别单个格子"""
+        cell_image = Image.fromarray(binarize(cell))  # 灰度化并二值化（NumPy一次完成）
+        
+        # OCR识别
+        text = pytesseract.image_to_string(cell_image, config='--psm 10')
+        # 清理识别结果
+        text = text.strip().replace('\n', '')
+        
+        # 转换为数字
+        try:
+            value = int(text) if text.isdigit() else 0
+        except:
+            value = 0
+        return value
                 
     def display_game_board(self):
         """显示游戏板"""
@@ -384,52 +423,95 @@ class Game2048Assistant:
         
     def toggle_auto_mode(self):
         """切换自动模式"""
-        self.is_auto_mode = not self.is_auto_mode
         if self.is_auto_mode:
-            self.auto_btn.config(text="停止自动")
-            self.log("启动自动模式")
-            self.auto_play()
-        else:
-            self.auto_btn.config(text="自动模式")
+            # 流水线的线程全部退出后才结束自动模式（见 finish_auto_player）
             self.log("停止自动模式")
-            
-    def auto_play(self):
-        """自动游戏"""
-        if not self.is_auto_mode:
+            self.auto_player.stop()
             return
+        if not self.game_region:
+            messagebox.showerror("错误", "请先选择游戏区域")
+            return
+        self.is_auto_mode = True
+        self.auto_btn.config(text="停止自动")
+        self.set_manual_controls(tk.DISABLED)
+        self.log("启动自动模式")
+        self.start_auto_player()
+        
+    def set_manual_controls(self, state):
+        """启用或禁用手动操作的按钮（自动模式下禁用，避免与识别线程同时使用识别状态）"""
+        for button in (self.select_area_btn, self.start_btn, self.ai_btn):
+            button.config(state=state)
             
-        try:
-            # 识别当前状态
-            self.recognize_game_board()
-            self.display_game_board()
-            
-            # 获取最佳移动
-            best_move = self.get_best_move()
-            
-            # 显示建议
-            direction_keys = {
-                'UP': 'up',
-                'DOWN': 'down',
-                'LEFT': 'left',
-                'RIGHT': 'right'
-            }
-            
-            self.suggestion_label.config(text=f"执行操作: {best_move}")
-            self.log(f"自动执行: {best_move}")
-            
-            # 发送按键（需要游戏窗口处于激活状态）
-            pyautogui.press(direction_keys[best_move])
-            
-            # 等待游戏更新
-            time.sleep(0.5)
-            
-            # 继续自动游戏
-            if self.is_auto_mode:
-                self.root.after(1000, self.auto_play)
-        except Exception as e:
-            self.log(f"自动游戏出错: {str(e)}")
-            self.is_auto_mode = False
-            self.auto_btn.config(text="自动模式")
+    def start_auto_player(self):
+        """启动流水线自动游戏：截图、识别、搜索加按键各在一个线程中进行"""
+        player = AutoPlayer(
+            self.grab_frame, self.recognize_frame, self.choose_move, self.press_move,
+            max_rate=self.max_rate_var.get(),
+            on_move=lambda board, move, settled: self.auto_events.put((player, 'move', board, move, settled)),
+            on_stop=lambda error: self.auto_events.put((player, 'stop', error)))
+        self.auto_player = player
+        player.start()
+        self.root.after(50, self.poll_auto_events, player)
+        
+    def recognize_frame(self, frame):
+        """在识别线程中识别一帧"""
+        return self.tracker.update(frame, fallback=self.read_cell)[0]
+        
+    def choose_move(self, board):
+        """在搜索线程中选择方向"""
+        self.game_board = board
+        return self.get_best_move()
+        
+    def press_move(self, move):
+        """发送按键（需要游戏窗口处于激活状态）"""
+        direction_keys = {
+            'UP': 'up',
+            'DOWN': 'down',
+            'LEFT': 'left',
+            'RIGHT': 'right'
+        }
+        pyautogui.press(direction_keys[move])
+        
+    def poll_auto_events(self, player):
+        """在界面线程中显示自动游戏的进展（只处理当前这一轮发出的事件）"""
+        if player is not self.auto_player:
+            return
+        while True:
+            try:
+                event = self.auto_events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] is not player:
+                continue
+            if event[1] == 'move':
+                _, _, board, move, settled = event
+                self.game_board = board
+                self.display_game_board()
+                latency = player.latency()
+                self.suggestion_label.config(
+                    text=f"执行操作: {move}\n截图{latency['capture']:.0f}ms 识别{latency['recognize']:.0f}ms "
+                         f"搜索{latency['search']:.0f}ms 按键{latency['press']:.0f}ms")
+                self.log(f"自动执行: {move}")
+                if not settled:
+                    self.log("画面未稳定或没有变化，可能移动无效或游戏窗口未激活")
+            else:
+                error = event[2]
+                if error is not None:
+                    self.log(f"自动游戏出错: {str(error)}")
+                self.log(f"自动模式结束，共执行{player.moves}步")
+                self.auto_btn.config(text="正在停止...", state=tk.DISABLED)
+                self.finish_auto_player(player)
+                return
+        self.root.after(50, self.poll_auto_events, player)
+        
+    def finish_auto_player(self, player):
+        """等流水线的线程全部退出后恢复手动操作（定时检查，不在界面线程中等待）"""
+        if player.is_alive():
+            self.root.after(50, self.finish_auto_player, player)
+            return
+        self.is_auto_mode = False
+        self.auto_btn.config(text="自动模式", state=tk.NORMAL)
+        self.set_manual_controls(tk.NORMAL)
 
 class RegionSelector:
     def __init__(self, parent, screenshot):
@@ -3,6 +3,12 @@ from tkinter import messagebox
 import time
 import random
 import math
+import queue
+
+from engine2048 import bitboard
+from engine2048.book import open_book
+from engine2048.search import Expectimax
+from engine2048.worker import SearchWorker
 
 class Advanced2048AI:
     def __init__(self, root):
@@ -21,8 +27,26 @@ class Advanced2048AI:
             'LEFT': (0, -1),
             'RIGHT': (0, 1)
         }
+        self.engine = Expectimax(depth=3)
+        # 每次AI建议的搜索时间预算（毫秒），深度随棋盘空格数自动调整
+        self.time_budget_ms = 200
+        # 搜索过的局面保存在本地局面库中，重复出现时直接给出结果
+        self.book = open_book(self.engine)
+        # 查库和搜索在后台线程中进行，结果经队列交回界面线程
+        self.search_worker = SearchWorker(self.engine, self.time_budget_ms, self.book)
+        self.search_results = queue.Queue()
+        self.search_job = None
         
         self.setup_ui()
+        self.poll_search_results()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+    def on_close(self):
+        """关闭窗口时结束后台搜索，并把局面库的使用时间写回磁盘"""
+        self.search_worker.stop()
+        if self.book is not None:
+            self.book.close()
+        self.root.destroy()
         
     def setup_ui(self):
         
@@ -32,6 +56,10 @@ class Advanced2048AI:
         
         self.ai_btn = tk.Button(control_frame, text="AI建议", command=self.get_ai_suggestion, state=tk.NORMAL)
         self.ai_btn.pack(side=tk.LEFT, padx=5)
+
+        # 后态搜索：得分与普通搜索相同，兄弟子局面共用移动计算，速度更快
+        self.afterstate_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(control_frame, text="后态搜索", variable=self.afterstate_var).pack(side=tk.LEFT, padx=5)
         
         # 游戏状态显示
         status_frame = tk.LabelFrame(self.root, text="游戏状态", padx=10, pady=10)
@@ -166,261 +194,67 @@ class Advanced2048AI:
         return colors.get(value, "#3C3A32")
         
     def get_ai_suggestion(self):
-        """获取AI建议 - 使用高级Expectimax算法"""
-        best_move = self.expectimax(tuple(tuple(row) for row in self.game_board), 3, True)[1]
-        
-        if best_move is None:
-            # 如果没有有效移动，随机选择一个
-            best_move = self.get_valid_moves(self.game_board)[0] if self.get_valid_moves(self.game_board) else None
+        """获取AI建议 - 在后台线程中运行高级Expectimax算法"""
+        # 新的局面会取消尚未完成的搜索
+        self.cancel_search()
+        try:
+            board = bitboard.from_grid(self.game_board)
+        except ValueError as e:
+            self.suggestion_label.config(text=f"棋盘数值无效: {e}")
+            return
             
-        if best_move:
-            direction_text = {
-                'UP': '上',
-                'DOWN': '下',
-                'LEFT': '左',
-                'RIGHT': '右'
-            }
-            self.suggestion_label.config(text=f"建议方向: {direction_text[best_move]} ({best_move})")
-        else:
+        if not bitboard.valid_moves(board):
             self.suggestion_label.config(text="游戏结束或无有效移动")
-        
-    def expectimax(self, board, depth, is_max):
-        """Expectimax算法实现"""
-        # 转换为列表以便操作
-        board_list = [list(row) for row in board]
-        
-        # 基本情况
-        if depth == 0 or not self.get_valid_moves(board_list):
-            return self.evaluate_board(board_list), None
-            
-        if is_max:
-            # 最大化玩家（选择移动）
-            max_score = -float('inf')
-            best_move = None
+            return
             
-            for direction in self.directions:
-                new_board = self.move_board_direction(board_list, direction)
-                if new_board != board_list:  # 如果移动有效
-                    score, _ = self.expectimax(tuple(tuple(row) for row in new_board), depth - 1, False)
-                    if score > max_score:
-                        max_score = score
-                        best_move = direction
-                        
-            return max_score, best_move
+        self.search_job = self.search_worker.submit(board, self.search_results.put,
+                                                 afterstate=self.afterstate_var.get())
+        self.suggestion_label.config(text="正在计算AI建议...")
+        
+    def cancel_search(self):
+        """取消正在进行的搜索"""
+        self.search_worker.cancel()
+        self.search_job = None
+        
+    def poll_search_results(self):
+        """在界面线程中取出后台搜索的结果"""
+        while True:
+            try:
+                result = self.search_results.get_nowait()
+            except queue.Empty:
+                break
+            if result.job == self.search_job:
+                self.show_suggestion(result)
+        self.root.after(50, self.poll_search_results)
+        
+    def show_suggestion(self, result):
+        """显示搜索结果（中间结果会被更深的结果覆盖）"""
+        direction_text = {
+            'UP': '上',
+            'DOWN': '下',
+            'LEFT': '左',
+            'RIGHT': '右'
+        }
+        if result.error is not None:
+            self.suggestion_label.config(text=f"搜索出错: {result.error}")
+            return
+        text = f"建议方向: {direction_text[result.move]} ({result.move}) 深度{result.depth}"
+        if not result.final:
+            text += " 搜索中..."
+        elif result.stats is None:
+            # 没有搜索统计的最终结果来自局面库
+            text += "\n局面库"
         else:
-            # 机会节点（随机添加新方块）
-            empty_cells = self.get_empty_cells(board_list)
-            if not empty_cells:
-                return self.evaluate_board(board_list), None
-                
-            expected_score = 0
-            total_prob = 0
-            
-            # 对每个空位置尝试放置2(90%概率)和4(10%概率)
-            for i, j in empty_cells:
-                for value, prob in [(2, 0.9), (4, 0.1)]:
-                    new_board = [row[:] for row in board_list]
-                    new_board[i][j] = value
-                    score, _ = self.expectimax(tuple(tuple(row) for row in new_board), depth - 1, True)
-                    expected_score += prob * score
-                    total_prob += prob
-                    
-            return expected_score / total_prob if total_prob > 0 else 0, None
-            
-    def get_empty_cells(self, board):
-        """获取所有空单元格的位置"""
-        empty_cells = []
-        for i in range(4):
-            for j in range(4):
-                if board[i][j] == 0:
-                    empty_cells.append((i, j))
-        return empty_cells
-        
-    def evaluate_board(self, board):
-        """评估棋盘得分 - 使用多种启发式方法"""
-        score = 0
-        
-        # 1. 空格奖励
-        empty_count = len(self.get_empty_cells(board))
-        score += empty_count * 1000
-        
-        # 2. 最大值奖励
-        max_tile = max(max(row) for row in board)
-        score += max_tile * 10
-        
-        # 3. 单调性评估
-        score += self.calculate_monotonicity(board) * 100
-        
-        # 4. 平滑度评估
-        score -= self.calculate_smoothness(board) * 10
-        
-        # 5. 边角权重（鼓励将大数字放在角落）
-        score += self.calculate_corner_weight(board) * 10000
-        
-        return score
-        
-    def calculate_monotonicity(self, board):
-        """计算单调性"""
-        # 水平单调性
-        hori_monotonicity = 0
-        for i in range(4):
-            for j in range(3):
-                if board[i][j] >= board[i][j+1]:
-                    hori_monotonicity += board[i][j] - board[i][j+1]
-                    
-        # 垂直单调性
-        vert_monotonicity = 0
-        for j in range(4):
-            for i in range(3):
-                if board[i][j] >= board[i+1][j]:
-                    vert_monotonicity += board[i][j] - board[i+1][j]
-                    
-        return hori_monotonicity + vert_monotonicity
-        
-    def calculate_smoothness(self, board):
-        """计算平滑度"""
-        smoothness = 0
-        for i in range(4):
-            for j in range(4):
-                if board[i][j] != 0:
-                    # 检查右边
-                    if j < 3 and board[i][j+1] != 0:
-                        smoothness += abs(board[i][j] - board[i][j+1])
-                    # 检查下边
-                    if i < 3 and board[i+1][j] != 0:
-                        smoothness += abs(board[i][j] - board[i+1][j])
-        return smoothness
-        
-    def calculate_corner_weight(self, board):
-        """计算角落权重"""
-        # 鼓励将最大值放在角落
-        max_tile = max(max(row) for row in board)
-        corner_score = 0
-        
-        # 检查四个角落
-        corners = [(0, 0), (0, 3), (3, 0), (3, 3)]
-        for i, (x, y) in enumerate(corners):
-            if board[x][y] == max_tile:
-                corner_score += (4 - i) * max_tile  # 给不同角落不同的权重
-                
-        return corner_score
-        
-    def get_valid_moves(self, board):
-        """获取所有有效的移动方向"""
-        valid_moves = []
-        for direction in self.directions:
-            new_board = self.move_board_direction(board, direction)
-            if new_board != board:
-                valid_moves.append(direction)
-        return valid_moves
-        
-    def move_board_direction(self, board, direction):
-        """根据方向移动棋盘"""
-        # 确保创建新棋盘的完整副本
-        new_board = [[board[i][j] for j in range(4)] for i in range(4)]
-        
-        if direction == 'LEFT':
-            for i in range(4):
-                # 移除0并合并相同数字
-                row = [x for x in new_board[i] if x != 0]
-                for j in range(len(row)-1):
-                    if row[j] == row[j+1]:
-                        row[j] *= 2
-                        row[j+1] = 0
-                row = [x for x in row if x != 0]
-                # 补齐0
-                row += [0] * (4 - len(row))
-                new_board[i] = row
-        elif direction == 'RIGHT':
-            for i in range(4):
-                row = [x for x in new_board[i] if x != 0]
-                for j in range(len(row)-1, 0, -1):
-                    if row[j] == row[j-1]:
-                        row[j] *= 2
-                        row[j-1] = 0
-                row = [x for x in row if x != 0]
-                row = [0] * (4 - len(row)) + row
-                new_board[i] = row
-        elif direction == 'UP':
-            for j in range(4):
-                col = [new_board[i][j] for i in range(4) if new_board[i][j] != 0]
-                for i in range(len(col)-1):
-                    if col[i] == col[i+1]:
-                        col[i] *= 2
-                        col[i+1] = 0
-                col = [x for x in col if x != 0]
-                col += [0] * (4 - len(col))
-                for i in range(4):
-                    new_board[i][j] = col[i]
-        elif direction == 'DOWN':
-            for j in range(4):
-                col = [new_board[i][j] for i in range(4) if new_board[i][j] != 0]
-                for i in range(len(col)-1, 0, -1):
-                    if col[i] == col[i-1]:
-                        col[i] *= 2
-                        col[i-1] = 0
-                col = [x for x in col if x != 0]
-                col = [0] * (4 - len(col)) + col
-                for i in range(4):
-                    new_board[i][j] = col[i]
-                    
-        return new_board
+            text += "\n" + result.stats.summary()
+        self.suggestion_label.config(text=text)
         
     def move_board(self, direction):
         """模拟移动，但不生成新数字"""
-        # 创建副本，确保不修改原始棋盘
-        new_board = [[self.game_board[i][j] for j in range(4)] for i in range(4)]
-        
-        # 移动逻辑，但不生成新数字
-        if direction == 'LEFT':
-            for i in range(4):
-                # 移除0并合并相同数字
-                row = [x for x in new_board[i] if x != 0]
-                for j in range(len(row)-1):
-                    if row[j] == row[j+1]:
-                        row[j] *= 2
-                        row[j+1] = 0
-                row = [x for x in row if x != 0]
-                # 补齐0
-                row += [0] * (4 - len(row))
-                new_board[i] = row
-        elif direction == 'RIGHT':
-            for i in range(4):
-                row = [x for x in new_board[i] if x != 0]
-                for j in range(len(row)-1, 0, -1):
-                    if row[j] == row[j-1]:
-                        row[j] *= 2
-                        row[j-1] = 0
-                row = [x for x in row if x != 0]
-                row = [0] * (4 - len(row)) + row
-                new_board[i] = row
-        elif direction == 'UP':
-            for j in range(4):
-                col = [new_board[i][j] for i in range(4) if new_board[i][j] != 0]
-                for i in range(len(col)-1):
-                    if col[i] == col[i+1]:
-                        col[i] *= 2
-                        col[i+1] = 0
-                col = [x for x in col if x != 0]
-                col += [0] * (4 - len(col))
-                for i in range(4):
-                    new_board[i][j] = col[i]
-        elif direction == 'DOWN':
-            for j in range(4):
-                col = [new_board[i][j] for i in range(4) if new_board[i][j] != 0]
-                for i in range(len(col)-1, 0, -1):
-                    if col[i] == col[i-1]:
-                        col[i] *= 2
-                        col[i-1] = 0
-                col = [x for x in col if x != 0]
-                col = [0] * (4 - len(col)) + col
-                for i in range(4):
-                    new_board[i][j] = col[i]
-                    
-        return new_board
+        return bitboard.move_grid(self.game_board, direction)
         
     def execute_move(self, direction):
         """执行移动操作"""
+        self.cancel_search()
         # 更新游戏板
         new_board = self.move_board(direction)
         # 修复引用问题，确保正确复制数组
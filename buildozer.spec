@@ -37,7 +37,7 @@ version = 1.0
 
 # (list) Application requirements
 # comma separated e.g. requirements = sqlite3,kivy
-requirements = python3,kivy,copy,os
+requirements = python3,kivy,sqlite3,copy,os
 
 # (str) Custom source folders for requirements
 # Sets custom source for any requirements with recipes
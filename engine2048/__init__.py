@@ -0,0 +1,14 @@
+"""
+2048 AI 引擎（无界面）
+
+各个界面版本（Tk 桌面版、Kivy 安卓版）和命令行工具共用的棋盘表示、评估函数
+与搜索算法。本包不导入任何界面库。
+"""
+
+from .bitboard import DIRECTIONS, from_grid, to_grid, move, move_grid, valid_moves
+from .cache import TranspositionTable
+from .heuristics import DEFAULT_WEIGHTS, HeuristicTables, evaluate_board
+from .parallel import ParallelExpectimax
+from .search import Expectimax, SearchTimeout
+from .stats import SearchStats
+from .worker import SearchResult, SearchWorker
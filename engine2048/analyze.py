@@ -0,0 +1,142 @@
+"""
+批量局面分析
+
+从文件（或标准输入）逐行读取局面，在进程池中搜索每个局面的最佳方向和得分，
+按输入顺序以JSON Lines输出，适合离线分析录制下来的大量局面。
+
+每行一个局面，支持两种格式，空行和以 # 开头的行会被跳过：
+    JSON数值数组：4x4嵌套 [[2,0,0,0],...] 或16个数的扁平数组
+    十六进制位棋盘：16位十六进制数字（可带0x前缀），每位是一个格子的阶，
+                   最低位是第0行第0列（与 bitboard.py 的编码相同）
+
+用法:
+    python -m engine2048.analyze boards.txt --workers 8 --chunksize 64 > results.jsonl
+    python -m engine2048.analyze - --budget-ms 100 < boards.txt
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import bitboard
+from .search import Expectimax
+
+# 工作进程中的搜索对象及每步时间预算
+_worker_engine = None
+_worker_budget_ms = None
+
+
+def _init_worker(options, budget_ms):
+    global _worker_engine, _worker_budget_ms
+    _worker_engine = Expectimax(**options)
+    _worker_budget_ms = budget_ms
+
+
+def _analyze(task):
+    line_no, board = task
+    start = time.perf_counter()
+    if _worker_budget_ms:
+        score, move, depth = _worker_engine.search_timed(board, _worker_budget_ms)
+    else:
+        score, move = _worker_engine.search(board)
+        depth = _worker_engine.depth
+    return {
+        'line': line_no,
+        'board': f'{board:016x}',
+        'move': move,
+        'score': score if move is not None else None,
+        'depth': depth,
+        'nodes': _worker_engine.nodes,
+        'ms': round((time.perf_counter() - start) * 1000, 3),
+    }
+
+
+def parse_board(text, base=2):
+    """解析一行文本为位棋盘，格式无效时抛出 ValueError"""
+    text = text.strip()
+    if text.startswith('[') or text.startswith('{'):
+        values = json.loads(text)
+        if isinstance(values, dict):
+            values = values.get('board')
+        if not isinstance(values, list):
+            raise ValueError("JSON局面必须是数值数组")
+        if len(values) == 4 and all(isinstance(row, list) for row in values):
+            values = [value for row in values for value in row]
+        if len(values) != 16:
+            raise ValueError("局面必须有16个格子")
+        for value in values:
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"格子必须是整数: {value!r}")
+        return bitboard.from_grid([values[i:i + 4] for i in range(0, 16, 4)], base)
+
+    digits = text[2:] if text.lower().startswith('0x') else text
+    # int() 还接受正负号和下划线，这里只允许恰好16个十六进制数字
+    if not re.fullmatch(r'[0-9a-fA-F]{16}', digits):
+        raise ValueError("十六进制局面必须是16位十六进制数字")
+    return int(digits, 16)
+
+
+def read_boards(lines, base=2):
+    """逐行解析，返回 (局面列表[(行号, 位棋盘)], 错误列表[(行号, 信息)])"""
+    boards = []
+    errors = []
+    for line_no, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text or text.startswith('#'):
+            continue
+        try:
+            boards.append((line_no, parse_board(text, base)))
+        except ValueError as e:
+            errors.append((line_no, str(e)))
+    return boards, errors
+
+
+def analyze(boards, workers=None, chunksize=16, budget_ms=None, **options):
+    """在进程池中分析 [(行号, 位棋盘)]，按输入顺序逐个产生结果字典"""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(options, budget_ms)) as pool:
+        for result in pool.map(_analyze, boards, chunksize=max(1, chunksize)):
+            yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="2048 局面批量分析")
+    parser.add_argument('input', nargs='?', default='-', help="局面文件，- 表示标准输入")
+    parser.add_argument('--output', '-o', help="结果文件（JSON Lines），默认输出到标准输出")
+    parser.add_argument('--workers', type=int, default=None, help="工作进程数，默认为CPU核数")
+    parser.add_argument('--chunksize', type=int, default=16, help="每次分给工作进程的局面数")
+    parser.add_argument('--depth', type=int, default=3, help="固定搜索深度")
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help="每个局面的时间预算（毫秒），设置后改用迭代加深")
+    parser.add_argument('--base', type=int, default=2, help="最小方块的数值（标准2048为2）")
+    parser.add_argument('--prob-cutoff', type=float, default=0.0001, help="概率剪枝阈值")
+    parser.add_argument('--cache-mb', type=float, default=32, help="每个进程的置换表内存上限")
+    args = parser.parse_args(argv)
+
+    if args.input == '-':
+        boards, errors = read_boards(sys.stdin, args.base)
+    else:
+        with open(args.input, encoding='utf-8') as f:
+            boards, errors = read_boards(f, args.base)
+    for line_no, message in errors:
+        print(f"第{line_no}行无法解析: {message}", file=sys.stderr)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for result in analyze(boards, args.workers, args.chunksize, args.budget_ms,
+                              depth=args.depth, base=args.base,
+                              prob_cutoff=args.prob_cutoff, cache_mb=args.cache_mb):
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
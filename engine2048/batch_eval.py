@@ -0,0 +1,75 @@
+"""
+NumPy批量评估
+
+把 N 个棋盘排成 N x 16 的数组，用向量运算一次性算出 N 个评估分数。
+启发式与 heuristics.evaluate_board 完全相同，逐项对应：
+空格、最大值、单调性、平滑度、边角权重。
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .heuristics import DEFAULT_WEIGHTS
+
+# 位棋盘中16个格子的位偏移
+CELL_SHIFTS = tuple(range(0, 64, 4))
+
+# 四个角落 (0,0) (0,3) (3,0) (3,3) 在展开后数组中的下标及其权重
+CORNER_INDEXES = (0, 3, 12, 15)
+CORNER_WEIGHTS = (4, 3, 2, 1)
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("批量评估需要 numpy，请先安装: pip install numpy")
+
+
+def boards_to_values(boards, base=2):
+    """位棋盘序列 -> N x 16 的数值数组"""
+    require_numpy()
+    packed = np.array(boards, dtype=np.uint64).reshape(-1, 1)
+    ranks = ((packed >> np.array(CELL_SHIFTS, dtype=np.uint64)) & np.uint64(0xF)).astype(np.int64)
+    return np.where(ranks > 0, base * np.left_shift(1, np.maximum(ranks - 1, 0)), 0)
+
+
+def evaluate_boards(values, weights=None):
+    """评估 N x 16 数值数组中的每个棋盘，返回长度为 N 的得分数组"""
+    require_numpy()
+    w = dict(DEFAULT_WEIGHTS, **(weights or {}))
+    cells = np.asarray(values, dtype=np.int64).reshape(-1, 4, 4)
+
+    # 1. 空格奖励
+    empty_count = (cells == 0).sum(axis=(1, 2))
+
+    # 2. 最大值奖励
+    max_tile = cells.max(axis=(1, 2))
+
+    # 3. 单调性：相邻两格（左->右，上->下）中前者不小于后者时累加差值
+    hori = cells[:, :, :-1] - cells[:, :, 1:]
+    vert = cells[:, :-1, :] - cells[:, 1:, :]
+    monotonicity = np.maximum(hori, 0).sum(axis=(1, 2)) + np.maximum(vert, 0).sum(axis=(1, 2))
+
+    # 4. 平滑度：相邻两格都非空时累加差值的绝对值
+    nonzero = cells != 0
+    hori_pairs = nonzero[:, :, :-1] & nonzero[:, :, 1:]
+    vert_pairs = nonzero[:, :-1, :] & nonzero[:, 1:, :]
+    smoothness = ((np.abs(hori) * hori_pairs).sum(axis=(1, 2))
+                  + (np.abs(vert) * vert_pairs).sum(axis=(1, 2)))
+
+    # 5. 边角权重
+    corners = cells.reshape(-1, 16)[:, list(CORNER_INDEXES)]
+    corner_hits = (corners == max_tile[:, None]) * np.array(CORNER_WEIGHTS)
+    corner_weight = corner_hits.sum(axis=1) * max_tile
+
+    return (empty_count * w['empty'] + max_tile * w['max_tile']
+            + monotonicity * w['monotonicity'] - smoothness * w['smoothness']
+            + corner_weight * w['corner'])
+
+
+def evaluate_bitboards(boards, base=2, weights=None):
+    """批量评估位棋盘，返回Python数值列表"""
+    if not boards:
+        return []
+    return evaluate_boards(boards_to_values(boards, base), weights).tolist()
@@ -0,0 +1,202 @@
+"""
+固定局面基准测试
+
+在一组精选局面（稀疏、拥挤、濒死、大方块）上计时引擎的核心操作，
+结果写成JSON，并可与保存的基线比较、标出变慢的项目。所有界面版本都通过
+本引擎搜索和移动，因此这里的数字就是各版本共同的性能。
+
+用法:
+    python -m engine2048.benchmark --output bench.json
+    python -m engine2048.benchmark --save-baseline baseline.json
+    python -m engine2048.benchmark --baseline baseline.json --threshold 0.2
+    python -m engine2048.benchmark --workers 4
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+from . import bitboard
+from .parallel import ParallelExpectimax
+from .search import Expectimax
+
+POSITIONS = {
+    # 开局：只有两三个方块，分支最多
+    'sparse_opening': [
+        [2, 0, 0, 0],
+        [0, 0, 0, 0],
+        [0, 4, 0, 0],
+        [0, 0, 0, 2],
+    ],
+    'sparse_midgame': [
+        [0, 0, 2, 0],
+        [0, 4, 0, 0],
+        [8, 0, 0, 0],
+        [64, 16, 4, 0],
+    ],
+    # 拥挤：空格很少
+    'crowded': [
+        [2, 4, 8, 16],
+        [4, 8, 16, 32],
+        [2, 0, 4, 2],
+        [8, 2, 0, 4],
+    ],
+    'crowded_mergeable': [
+        [128, 64, 32, 16],
+        [8, 8, 4, 2],
+        [2, 4, 0, 4],
+        [4, 2, 4, 0],
+    ],
+    # 濒死：只剩一两步可走
+    'near_death': [
+        [2, 4, 2, 4],
+        [4, 2, 4, 2],
+        [2, 4, 2, 4],
+        [4, 2, 4, 4],
+    ],
+    'near_death_one_gap': [
+        [512, 256, 128, 64],
+        [2, 4, 8, 16],
+        [4, 8, 16, 2],
+        [8, 16, 2, 0],
+    ],
+    # 大方块：后期局面
+    'high_tile': [
+        [2048, 1024, 512, 256],
+        [16, 32, 64, 128],
+        [8, 4, 2, 0],
+        [0, 2, 0, 0],
+    ],
+    'high_tile_sparse': [
+        [4096, 2048, 0, 0],
+        [256, 0, 0, 0],
+        [16, 0, 2, 0],
+        [0, 0, 0, 0],
+    ],
+}
+
+
+def _time_call(func, min_seconds, repeat):
+    # 自动确定循环次数，取多轮中最快的一轮，返回每次调用的秒数
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_seconds / repeat or number >= 1 << 20:
+            break
+        number *= 2
+    return min(timer.repeat(repeat, number)) / number
+
+
+def benchmark_position(grid, depth=3, min_seconds=0.2, repeat=3, parallel=None):
+    """计时一个局面上的各项操作，返回 {操作: 每次调用秒数}
+
+    parallel 为 ParallelExpectimax 时同时计时多进程并行搜索（parallel_expectimax）。
+    """
+    board = bitboard.from_grid(grid)
+    # 关闭置换表，测量的是完整搜索而不是缓存命中
+    engine = Expectimax(depth=depth, cache_mb=0)
+    results = {
+        'expectimax': _time_call(lambda: engine.search(board), min_seconds, repeat),
+        'expectimax_batched': _time_call(lambda: engine.search_batched(board), min_seconds, repeat),
+        'move_board_direction': _time_call(
+            lambda: [bitboard.move_grid(grid, d) for d in bitboard.DIRECTIONS], min_seconds, repeat),
+        'evaluate_board': _time_call(lambda: engine.evaluate(board), min_seconds, repeat),
+        'get_valid_moves': _time_call(lambda: bitboard.valid_moves(board), min_seconds, repeat),
+    }
+    if parallel is not None:
+        results['parallel_expectimax'] = _time_call(lambda: parallel.search(board, depth),
+                                                    min_seconds, repeat)
+    return results
+
+
+def run(positions=None, depth=3, min_seconds=0.2, repeat=3, workers=None):
+    """在全部（或指定）局面上运行基准测试；workers为进程数时加测多进程并行搜索"""
+    names = positions or list(POSITIONS)
+    # 进程池在各局面之间复用，工作进程同样关闭置换表
+    parallel = ParallelExpectimax(workers, depth=depth, cache_mb=0) if workers else None
+    try:
+        results = {name: benchmark_position(POSITIONS[name], depth, min_seconds, repeat, parallel)
+                   for name in names}
+    finally:
+        if parallel is not None:
+            parallel.close()
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'depth': depth,
+            'workers': workers or 0,
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.2):
+    """与基线比较，返回变慢超过阈值的项目 [(局面, 操作, 基线秒数, 当前秒数)]"""
+    slowdowns = []
+    for name, ops in current['results'].items():
+        base_ops = baseline.get('results', {}).get(name, {})
+        for op, seconds in ops.items():
+            base_seconds = base_ops.get(op)
+            if base_seconds and seconds > base_seconds * (1 + threshold):
+                slowdowns.append((name, op, base_seconds, seconds))
+    return slowdowns
+
+
+def format_report(current, baseline=None):
+    """整理成表格文本"""
+    lines = [f"{'局面':<20}{'操作':<22}{'每次耗时':>12}{'相对基线':>10}"]
+    for name, ops in current['results'].items():
+        for op, seconds in ops.items():
+            ratio = ''
+            if baseline:
+                base_seconds = baseline.get('results', {}).get(name, {}).get(op)
+                if base_seconds:
+                    ratio = f"{seconds / base_seconds:.2f}x"
+            lines.append(f"{name:<20}{op:<22}{seconds * 1e6:>10.1f}us{ratio:>10}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="2048 AI 引擎基准测试")
+    parser.add_argument('--positions', nargs='*', choices=sorted(POSITIONS), help="只测试指定局面")
+    parser.add_argument('--depth', type=int, default=3, help="expectimax 搜索深度")
+    parser.add_argument('--min-seconds', type=float, default=0.2, help="每项至少计时的秒数")
+    parser.add_argument('--repeat', type=int, default=3, help="计时轮数（取最快一轮）")
+    parser.add_argument('--output', help="把结果写入JSON文件")
+    parser.add_argument('--baseline', help="与该JSON基线比较")
+    parser.add_argument('--save-baseline', help="把本次结果保存为基线")
+    parser.add_argument('--threshold', type=float, default=0.2, help="判定变慢的相对阈值")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="同时计时多进程并行搜索的进程数，0为不测")
+    args = parser.parse_args(argv)
+
+    current = run(args.positions, args.depth, args.min_seconds, args.repeat, args.workers)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print(format_report(current, baseline))
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(current, f, ensure_ascii=False, indent=2)
+
+    if baseline:
+        slowdowns = compare(current, baseline, args.threshold)
+        for name, op, base_seconds, seconds in slowdowns:
+            print(f"变慢: {name} / {op}: {base_seconds * 1e6:.1f}us -> {seconds * 1e6:.1f}us")
+        if slowdowns:
+            return 1
+        print("没有超过阈值的变慢")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
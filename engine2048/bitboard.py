@@ -0,0 +1,234 @@
+"""
+64位棋盘表示
+
+每个格子占4位，存放方块的"阶"：0表示空格，阶r对应数值 base * 2**(r-1)。
+标准2048中 base=2（2->1, 4->2, 8->3 ...）；以1为最小方块的变体使用 base=1。
+第i行第j列位于第 4*(4*i+j) 位起的4位中，因此每一行正好是一个16位整数，
+第0列在该整数的最低4位。行的移动与合并通过 tables.py 中的查找表完成。
+"""
+
+from .tables import (ROW_LEFT, ROW_RIGHT, ROW_SCORE_LEFT, ROW_SCORE_RIGHT,
+                     COL_UP, COL_DOWN, ROW_CHANGED, MAX_RANK)
+
+DIRECTIONS = ('UP', 'DOWN', 'LEFT', 'RIGHT')
+
+# 合法移动掩码中第k位对应 DIRECTIONS[k]；按掩码预先列出对应的方向
+MASK_DIRECTIONS = tuple(tuple(d for k, d in enumerate(DIRECTIONS) if mask >> k & 1)
+                        for mask in range(16))
+
+ROW_MASK = 0xFFFF
+
+
+def rank_of(value, base=2):
+    """数值 -> 阶"""
+    if value == 0:
+        return 0
+    rank = value.bit_length() - base.bit_length() + 1
+    if value & (value - 1) or rank < 1 or rank > MAX_RANK:
+        raise ValueError(f"无法表示的方块数值: {value}")
+    return rank
+
+
+def value_of(rank, base=2):
+    """阶 -> 数值"""
+    return base << (rank - 1) if rank else 0
+
+
+def from_grid(grid, base=2):
+    """4x4列表棋盘 -> 位棋盘"""
+    board = 0
+    shift = 0
+    for row in grid:
+        for value in row:
+            board |= rank_of(value, base) << shift
+            shift += 4
+    return board
+
+
+def to_grid(board, base=2):
+    """位棋盘 -> 4x4列表棋盘"""
+    return [[value_of((board >> (16 * i + 4 * j)) & 0xF, base) for j in range(4)]
+            for i in range(4)]
+
+
+def transpose(board):
+    """行列互换，使上下移动可以复用左右移动的逻辑"""
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def flip_rows(board):
+    """每一行左右翻转"""
+    return (((board & 0x000F000F000F000F) << 12) | ((board & 0x00F000F000F000F0) << 4)
+            | ((board >> 4) & 0x00F000F000F000F0) | ((board >> 12) & 0x000F000F000F000F))
+
+
+def flip_cols(board):
+    """上下翻转（交换第0、3行和第1、2行）"""
+    return (((board & 0xFFFF) << 48) | ((board & 0xFFFF0000) << 16)
+            | ((board >> 16) & 0xFFFF0000) | (board >> 48))
+
+
+# 棋盘的8种对称变换用0-7编号：第0位为转置，第1位为左右翻转，第2位为上下翻转，
+# 按这个顺序依次施加。0是恒等变换，1是只转置。
+ALL_SYMMETRIES = tuple(range(8))
+
+# 每种变换施加后方向的对应关系
+_SWAP_TRANSPOSE = {'UP': 'LEFT', 'LEFT': 'UP', 'DOWN': 'RIGHT', 'RIGHT': 'DOWN'}
+_SWAP_ROWS = {'UP': 'UP', 'DOWN': 'DOWN', 'LEFT': 'RIGHT', 'RIGHT': 'LEFT'}
+_SWAP_COLS = {'UP': 'DOWN', 'DOWN': 'UP', 'LEFT': 'LEFT', 'RIGHT': 'RIGHT'}
+
+
+def _symmetry_moves(sym):
+    moves = {}
+    for direction in DIRECTIONS:
+        mapped = direction
+        if sym & 1:
+            mapped = _SWAP_TRANSPOSE[mapped]
+        if sym & 2:
+            mapped = _SWAP_ROWS[mapped]
+        if sym & 4:
+            mapped = _SWAP_COLS[mapped]
+        moves[direction] = mapped
+    return moves
+
+
+# SYMMETRY_MOVES[s][d]：原棋盘上的方向d在变换s后的棋盘上对应的方向；
+# SYMMETRY_INVERSE_MOVES[s] 是反过来的对应关系
+SYMMETRY_MOVES = tuple(_symmetry_moves(sym) for sym in ALL_SYMMETRIES)
+SYMMETRY_INVERSE_MOVES = tuple({v: k for k, v in moves.items()} for moves in SYMMETRY_MOVES)
+
+
+def apply_symmetry(board, sym):
+    """对位棋盘施加编号为sym的对称变换"""
+    if sym & 1:
+        board = transpose(board)
+    if sym & 2:
+        board = flip_rows(board)
+    if sym & 4:
+        board = flip_cols(board)
+    return board
+
+
+def canonical(board, symmetries=ALL_SYMMETRIES):
+    """在给定的对称变换中取数值最小的棋盘作为代表，返回 (代表棋盘, 变换编号)
+
+    原棋盘上的方向d在代表棋盘上是 SYMMETRY_MOVES[变换编号][d]。
+    """
+    best = board
+    best_sym = 0
+    for sym in symmetries:
+        if sym:
+            candidate = apply_symmetry(board, sym)
+            if candidate < best:
+                best = candidate
+                best_sym = sym
+    return best, best_sym
+
+
+def move(board, direction):
+    """根据方向移动棋盘，返回新的位棋盘（不生成新数字）"""
+    if direction == 'LEFT':
+        t = ROW_LEFT
+        return (t[board & ROW_MASK] | (t[(board >> 16) & ROW_MASK] << 16)
+                | (t[(board >> 32) & ROW_MASK] << 32) | (t[board >> 48] << 48))
+    if direction == 'RIGHT':
+        t = ROW_RIGHT
+        return (t[board & ROW_MASK] | (t[(board >> 16) & ROW_MASK] << 16)
+                | (t[(board >> 32) & ROW_MASK] << 32) | (t[board >> 48] << 48))
+    if direction == 'UP':
+        t = COL_UP
+    elif direction == 'DOWN':
+        t = COL_DOWN
+    else:
+        raise ValueError(f"未知方向: {direction}")
+    # 转置后每一行就是原棋盘的一列，查表得到该列的差值
+    c = transpose(board)
+    return (board ^ t[c & ROW_MASK] ^ (t[(c >> 16) & ROW_MASK] << 4)
+            ^ (t[(c >> 32) & ROW_MASK] << 8) ^ (t[c >> 48] << 12))
+
+
+def move_score(board, direction):
+    """移动时合并出的方块数值之和（按base=2计算）"""
+    if direction in ('UP', 'DOWN'):
+        board = transpose(board)
+    t = ROW_SCORE_LEFT if direction in ('UP', 'LEFT') else ROW_SCORE_RIGHT
+    return (t[board & ROW_MASK] + t[(board >> 16) & ROW_MASK]
+            + t[(board >> 32) & ROW_MASK] + t[board >> 48])
+
+
+def move_grid(grid, direction, base=2):
+    """列表棋盘版本的移动，供界面代码使用（不生成新数字）"""
+    try:
+        board = from_grid(grid, base)
+    except ValueError:
+        # 棋盘上有无法用阶表示的数值（例如手动输入了3），按普通列表逻辑移动
+        return _move_grid_slow(grid, direction)
+    return to_grid(move(board, direction), base)
+
+
+def _move_grid_slow(grid, direction):
+    lines = [list(row) for row in grid]
+    if direction in ('UP', 'DOWN'):
+        lines = [list(col) for col in zip(*lines)]
+    if direction in ('RIGHT', 'DOWN'):
+        lines = [line[::-1] for line in lines]
+
+    for k, line in enumerate(lines):
+        # 移除0并合并相同数字
+        line = [x for x in line if x != 0]
+        for j in range(len(line)-1):
+            if line[j] == line[j+1]:
+                line[j] *= 2
+                line[j+1] = 0
+        line = [x for x in line if x != 0]
+        # 补齐0
+        lines[k] = line + [0] * (4 - len(line))
+
+    if direction in ('RIGHT', 'DOWN'):
+        lines = [line[::-1] for line in lines]
+    if direction in ('UP', 'DOWN'):
+        lines = [list(row) for row in zip(*lines)]
+    return lines
+
+
+def move_mask(board):
+    """合法移动方向的位掩码，直接由各行各列的变化标志得到，不生成移动后的棋盘
+
+    一行可以向左（右）移动，当且仅当行中有相邻的相等方块或方块左（右）侧有空格，
+    这正是查找表中的变化标志；列的上下移动等价于转置后各行的左右移动。
+    """
+    t = ROW_CHANGED
+    rows = (t[board & ROW_MASK] | t[(board >> 16) & ROW_MASK]
+            | t[(board >> 32) & ROW_MASK] | t[board >> 48])
+    c = transpose(board)
+    cols = (t[c & ROW_MASK] | t[(c >> 16) & ROW_MASK]
+            | t[(c >> 32) & ROW_MASK] | t[c >> 48])
+    return (rows << 2) | cols
+
+
+def valid_moves(board):
+    """获取所有有效的移动方向"""
+    return list(MASK_DIRECTIONS[move_mask(board)])
+
+
+def empty_shifts(board):
+    """获取所有空格的位偏移量"""
+    return [shift for shift in range(0, 64, 4) if not (board >> shift) & 0xF]
+
+
+def max_rank(board):
+    """棋盘上最大的阶"""
+    best = 0
+    while board:
+        rank = board & 0xF
+        if rank > best:
+            best = rank
+        board >>= 4
+    return best
@@ -0,0 +1,192 @@
+"""
+局面库
+
+把搜索过的局面（位棋盘 -> 最佳方向、得分、深度）保存在本地SQLite数据库中，
+再次遇到同一局面时直接给出结果，不必重新搜索。开局阶段的局面在不同对局之间
+重复得最多，命中率也最高。
+
+搜索结果依赖评估权重和最小方块数值，因此每条记录都带有 variant 标记
+（见 book_variant），不同配置的结果互不混用。记录数超过上限时淘汰最久未使用的记录。
+给出 symmetries 时按对称变换下的代表棋盘存取（见 bitboard.canonical），
+互相对称的局面共用一条记录。
+
+search_with_book 是各界面共用的"查局面库 -> 搜索 -> 存入局面库"流程。
+Python 没有编译 sqlite3 模块时（例如未加 sqlite3 的安卓打包）open_book 返回None，
+界面照常搜索，只是没有局面库。
+"""
+
+import json
+import threading
+import time
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+from . import bitboard
+from .paths import data_path
+from .stats import SearchStats
+
+BOOK_FILE = 'position_book.sqlite3'
+
+# 每写入这么多条记录检查一次是否超出上限
+CAPACITY_CHECK_INTERVAL = 100
+
+
+def to_signed(board):
+    """64位无符号位棋盘 -> SQLite可存储的有符号64位整数"""
+    return board - (1 << 64) if board >= 1 << 63 else board
+
+
+def book_variant(engine):
+    """搜索配置的标记：base和评估权重相同的搜索才能共用记录"""
+    return f"b{engine.base}:" + json.dumps(engine.heuristic.weights, sort_keys=True)
+
+
+class PositionBook:
+    """SQLite局面库，max_entries为记录数上限，symmetries为合并局面时使用的对称变换"""
+
+    def __init__(self, path=None, variant='', max_entries=200000, symmetries=None):
+        if sqlite3 is None:
+            raise ImportError("局面库需要 sqlite3 模块")
+        self.path = path or data_path(BOOK_FILE)
+        self.variant = variant
+        self.max_entries = max_entries
+        self.symmetries = symmetries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 命中时只在内存中记下使用时间，下次写入时一并提交
+        self._touched = {}
+        self._writes = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS positions ("
+            " board INTEGER NOT NULL, variant TEXT NOT NULL,"
+            " move TEXT NOT NULL, score REAL NOT NULL, depth INTEGER NOT NULL,"
+            " used REAL NOT NULL, PRIMARY KEY (board, variant))")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS positions_used ON positions (used)")
+        self._conn.commit()
+
+    @classmethod
+    def for_engine(cls, engine, path=None, max_entries=200000):
+        """按搜索对象的配置打开局面库"""
+        return cls(path, book_variant(engine), max_entries, engine.symmetries)
+
+    def _canonical(self, board):
+        if self.symmetries is None:
+            return board, 0
+        return bitboard.canonical(board, self.symmetries)
+
+    def lookup(self, board, min_depth=0):
+        """查找局面，存在且深度不小于min_depth时返回 (得分, 最佳方向, 深度)，否则返回None"""
+        board, sym = self._canonical(board)
+        key = to_signed(board)
+        with self._lock:
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT score, move, depth FROM positions WHERE board = ? AND variant = ?",
+                (key, self.variant)).fetchone()
+            if row is None or row[2] < min_depth:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            score, move, depth = row
+            return score, bitboard.SYMMETRY_INVERSE_MOVES[sym][move], depth
+
+    def store(self, board, move, score, depth):
+        """保存搜索结果；已有更深的结果时保留原记录"""
+        if move is None:
+            return
+        board, sym = self._canonical(board)
+        move = bitboard.SYMMETRY_MOVES[sym][move]
+        with self._lock:
+            if self._conn is None:
+                return
+            now = time.time()
+            self._conn.execute(
+                "INSERT INTO positions (board, variant, move, score, depth, used)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (board, variant) DO UPDATE SET"
+                " move = excluded.move, score = excluded.score,"
+                " depth = excluded.depth, used = excluded.used"
+                " WHERE excluded.depth >= positions.depth",
+                (to_signed(board), self.variant, move, score, depth, now))
+            self._flush_touched()
+            self._writes += 1
+            if self._writes % CAPACITY_CHECK_INTERVAL == 0:
+                self._evict()
+            self._conn.commit()
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE positions SET used = ? WHERE board = ? AND variant = ?",
+                [(used, key, self.variant) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self):
+        # 超出上限时删除最久未使用的记录，一次多删10%，避免频繁淘汰
+        count = self._conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        if count > self.max_entries:
+            excess = count - int(self.max_entries * 0.9)
+            self._conn.execute(
+                "DELETE FROM positions WHERE rowid IN"
+                " (SELECT rowid FROM positions ORDER BY used LIMIT ?)", (excess,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def stats(self):
+        """命中统计"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        """提交未保存的使用时间并关闭数据库"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+
+def open_book(engine, path=None, max_entries=200000):
+    """打开局面库，无法打开时返回None（界面在没有局面库时照常搜索）"""
+    if sqlite3 is None:
+        print("无法打开局面库: 缺少 sqlite3 模块")
+        return None
+    try:
+        return PositionBook.for_engine(engine, path, max_entries)
+    except sqlite3.Error as e:
+        print(f"无法打开局面库: {e}")
+        return None
+
+
+def search_with_book(engine, board, budget_ms, book=None, stats=None, **kwargs):
+    """先查局面库，没有足够深的记录时迭代加深搜索，并把结果存入局面库
+
+    返回 (得分, 最佳方向, 深度, 是否来自局面库)；其余参数传给 engine.search_timed。
+    只搜完一部分方向的结果（stats.partial）不存入局面库，以免被当作该深度的完整结果。
+    局面库定义了 __len__，空库为假值，因此用 is not None 判断。
+    """
+    hit = book.lookup(board, engine.depth) if book is not None else None
+    if hit:
+        score, move, depth = hit
+        return score, move, depth, True
+    if stats is None:
+        stats = SearchStats()
+    score, move, depth = engine.search_timed(board, budget_ms, stats=stats, **kwargs)
+    if book is not None and not stats.partial:
+        book.store(board, move, score, depth)
+    return score, move, depth, False
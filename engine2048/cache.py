@@ -0,0 +1,103 @@
+"""
+Expectimax置换表
+
+不同的移动顺序和出数顺序经常到达相同的局面。置换表以 (局面, 剩余深度, 节点类型)
+为键缓存搜索结果，并按内存上限淘汰旧条目。它挂在搜索对象上，因此在同一会话中
+连续多次获取AI建议时可以继续命中。
+"""
+
+from collections import OrderedDict
+
+# 每个条目的近似内存占用（键、值元组及字典/链表开销），用于把内存上限换算成条目数
+ENTRY_BYTES = 250
+
+POLICIES = ('lru', 'depth')
+
+
+def make_key(board, depth, is_max):
+    """把局面、剩余深度和节点类型打包成一个整数键"""
+    return (board << 8) | (depth << 1) | (1 if is_max else 0)
+
+
+class TranspositionTable:
+    """有内存上限的置换表
+
+    policy='lru'   淘汰最久未使用的条目
+    policy='depth' 优先淘汰剩余深度最浅（重新计算最便宜）的条目，同深度内按LRU
+    """
+
+    def __init__(self, max_mb=32, policy='lru'):
+        if policy not in POLICIES:
+            raise ValueError(f"未知的淘汰策略: {policy}")
+        self.max_mb = max_mb
+        self.max_entries = max(1, int(max_mb * 1024 * 1024 / ENTRY_BYTES))
+        self.policy = policy
+        # depth策略下按剩余深度分桶，lru策略只使用一个桶
+        self.buckets = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _bucket(self, depth):
+        if self.policy == 'lru':
+            depth = 0
+        bucket = self.buckets.get(depth)
+        if bucket is None:
+            bucket = self.buckets[depth] = OrderedDict()
+        return bucket
+
+    def get(self, board, depth, is_max):
+        """查找缓存结果，未命中时返回None"""
+        bucket = self._bucket(depth)
+        key = make_key(board, depth, is_max)
+        value = bucket.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        bucket.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def contains(self, board, depth, is_max):
+        """是否已缓存（不计入命中统计，也不改变淘汰顺序）"""
+        return make_key(board, depth, is_max) in self._bucket(depth)
+
+    def put(self, board, depth, is_max, value):
+        """写入搜索结果，超出上限时淘汰旧条目"""
+        bucket = self._bucket(depth)
+        key = make_key(board, depth, is_max)
+        if key in bucket:
+            bucket.move_to_end(key)
+        else:
+            self.size += 1
+        bucket[key] = value
+        while self.size > self.max_entries:
+            self._evict()
+
+    def _evict(self):
+        for depth in sorted(self.buckets):
+            bucket = self.buckets[depth]
+            if bucket:
+                bucket.popitem(last=False)
+                self.size -= 1
+                self.evictions += 1
+                return
+
+    def clear(self):
+        """清空缓存（统计数据保留）"""
+        self.buckets.clear()
+        self.size = 0
+
+    def stats(self):
+        """命中统计"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': self.size,
+            'max_entries': self.max_entries,
+            'evictions': self.evictions,
+            'policy': self.policy,
+        }
@@ -0,0 +1,236 @@
+"""
+棋盘评估函数
+
+evaluate_board 等函数作用于4x4数值列表棋盘，与界面代码中的评估完全一致；
+HeuristicTables 用逐行查找表在位棋盘上计算同样的分数，并支持在父局面的逐行逐列
+部分和上增量地评估放入一个新方块后的局面。
+"""
+
+from .bitboard import ALL_SYMMETRIES, transpose
+
+
+def get_empty_cells(board):
+    """获取所有空单元格的位置"""
+    empty_cells = []
+    for i in range(4):
+        for j in range(4):
+            if board[i][j] == 0:
+                empty_cells.append((i, j))
+    return empty_cells
+
+
+def evaluate_board(board):
+    """评估棋盘得分 - 使用多种启发式方法"""
+    score = 0
+
+    # 1. 空格奖励
+    empty_count = len(get_empty_cells(board))
+    score += empty_count * 1000
+
+    # 2. 最大值奖励
+    max_tile = max(max(row) for row in board)
+    score += max_tile * 10
+
+    # 3. 单调性评估
+    score += calculate_monotonicity(board) * 100
+
+    # 4. 平滑度评估
+    score -= calculate_smoothness(board) * 10
+
+    # 5. 边角权重（鼓励将大数字放在角落）
+    score += calculate_corner_weight(board) * 10000
+
+    return score
+
+
+def calculate_monotonicity(board):
+    """计算单调性"""
+    # 水平单调性
+    hori_monotonicity = 0
+    for i in range(4):
+        for j in range(3):
+            if board[i][j] >= board[i][j+1]:
+                hori_monotonicity += board[i][j] - board[i][j+1]
+
+    # 垂直单调性
+    vert_monotonicity = 0
+    for j in range(4):
+        for i in range(3):
+            if board[i][j] >= board[i+1][j]:
+                vert_monotonicity += board[i][j] - board[i+1][j]
+
+    return hori_monotonicity + vert_monotonicity
+
+
+def calculate_smoothness(board):
+    """计算平滑度"""
+    smoothness = 0
+    for i in range(4):
+        for j in range(4):
+            if board[i][j] != 0:
+                # 检查右边
+                if j < 3 and board[i][j+1] != 0:
+                    smoothness += abs(board[i][j] - board[i][j+1])
+                # 检查下边
+                if i < 3 and board[i+1][j] != 0:
+                    smoothness += abs(board[i][j] - board[i+1][j])
+    return smoothness
+
+
+def calculate_corner_weight(board):
+    """计算角落权重"""
+    # 鼓励将最大值放在角落
+    max_tile = max(max(row) for row in board)
+    corner_score = 0
+
+    # 检查四个角落
+    corners = [(0, 0), (0, 3), (3, 0), (3, 3)]
+    for i, (x, y) in enumerate(corners):
+        if board[x][y] == max_tile:
+            corner_score += (4 - i) * max_tile  # 给不同角落不同的权重
+
+    return corner_score
+
+
+# 各评估项的默认权重
+DEFAULT_WEIGHTS = {
+    'empty': 1000,
+    'max_tile': 10,
+    'monotonicity': 100,
+    'smoothness': 10,
+    'corner': 10000,
+}
+
+# 四个角落 (0,0) (0,3) (3,0) (3,3) 的位偏移及其权重
+CORNER_SHIFTS = ((0, 4), (12, 3), (48, 2), (60, 1))
+
+# 每种base对应的逐行原始分量 (空格数, 单调性, 平滑度, 最大阶)，与权重无关
+_row_components = {}
+
+
+def _line_components(values):
+    """一行（或一列）4个数值的空格数、单调性和平滑度"""
+    empty = 0
+    monotonicity = 0
+    smoothness = 0
+    for k in range(4):
+        if values[k] == 0:
+            empty += 1
+    for k in range(3):
+        if values[k] >= values[k+1]:
+            monotonicity += values[k] - values[k+1]
+        if values[k] != 0 and values[k+1] != 0:
+            smoothness += abs(values[k] - values[k+1])
+    return empty, monotonicity, smoothness
+
+
+def row_components(base=2):
+    """为全部65536种行状态计算原始分量（按base缓存）"""
+    components = _row_components.get(base)
+    if components is None:
+        empties, monos, smooths, max_ranks = [], [], [], []
+        for row in range(65536):
+            ranks = [(row >> shift) & 0xF for shift in (0, 4, 8, 12)]
+            values = [base << (rank - 1) if rank else 0 for rank in ranks]
+            empty, monotonicity, smoothness = _line_components(values)
+            empties.append(empty)
+            monos.append(monotonicity)
+            smooths.append(smoothness)
+            max_ranks.append(max(ranks))
+        components = _row_components[base] = (empties, monos, smooths, max_ranks)
+    return components
+
+
+class HeuristicTables:
+    """按行预先计算的评估表
+
+    空格、单调性和平滑度都可以拆成4行与4列各自的贡献之和，因此把每种行状态的
+    贡献预先乘好权重存入表中，评估一个位棋盘只需8次查表求和；最大值和边角权重
+    由各行的最大阶和四个角落直接算出。结果与 evaluate_board 完全相同。
+    修改权重时重新组合查找表。
+    """
+
+    def __init__(self, base=2, weights=None):
+        self.base = base
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.set_weights(**(weights or {}))
+
+    def set_weights(self, **weights):
+        """修改权重并重建查找表"""
+        unknown = set(weights) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"未知的评估权重: {', '.join(sorted(unknown))}")
+        self.weights.update(weights)
+        self._build()
+
+    def _build(self):
+        empties, monos, smooths, max_ranks = row_components(self.base)
+        w = self.weights
+        # 行表包含空格项；列表不含，避免同一个空格被计算两次
+        self.row_table = [e * w['empty'] + m * w['monotonicity'] - s * w['smoothness']
+                          for e, m, s in zip(empties, monos, smooths)]
+        self.col_table = [m * w['monotonicity'] - s * w['smoothness']
+                          for m, s in zip(monos, smooths)]
+        self.max_rank_table = max_ranks
+
+    def symmetries(self):
+        """评估值保持不变的对称变换（编号见 bitboard.ALL_SYMMETRIES）
+
+        空格、最大值和平滑度在全部8种变换下不变；单调性只统计从左到右、从上到下
+        递减的方向，只在转置下不变；边角权重四个角各不相同，在任何非恒等变换下都会改变。
+        因此默认权重下只有恒等变换。
+        """
+        if self.weights['corner']:
+            return (0,)
+        if self.weights['monotonicity']:
+            return (0, 1)
+        return ALL_SYMMETRIES
+
+    def evaluate(self, board):
+        """评估位棋盘"""
+        lines, _, max_rank = self.partial(board)
+        return lines + self._max_terms(board, max_rank)
+
+    def partial(self, board):
+        """逐行逐列部分和，返回 (4行4列查表之和, 转置棋盘, 最大阶)，供增量评估使用"""
+        rows = self.row_table
+        cols = self.col_table
+        t = transpose(board)
+        r0 = board & 0xFFFF
+        r1 = (board >> 16) & 0xFFFF
+        r2 = (board >> 32) & 0xFFFF
+        r3 = board >> 48
+        lines = (rows[r0] + rows[r1] + rows[r2] + rows[r3]
+                 + cols[t & 0xFFFF] + cols[(t >> 16) & 0xFFFF]
+                 + cols[(t >> 32) & 0xFFFF] + cols[t >> 48])
+        max_ranks = self.max_rank_table
+        return lines, t, max(max_ranks[r0], max_ranks[r1], max_ranks[r2], max_ranks[r3])
+
+    def evaluate_spawn(self, parent, partial, shift, rank):
+        """增量评估在父局面的空格shift处放入阶为rank的方块后的局面
+
+        partial 为父局面的 partial() 结果。新方块只改变一行和一列，
+        因此只需替换这一行、一列的查表值，结果与 evaluate 完全相同。
+        """
+        lines, t, max_rank = partial
+        row_shift = shift & ~0xF
+        col_shift = (shift & 0xF) << 2
+        cell = shift & 0xF
+        old_row = (parent >> row_shift) & 0xFFFF
+        old_col = (t >> col_shift) & 0xFFFF
+        rows = self.row_table
+        cols = self.col_table
+        lines += (rows[old_row | (rank << cell)] - rows[old_row]
+                  + cols[old_col | (rank << (row_shift >> 2))] - cols[old_col])
+        return lines + self._max_terms(parent | (rank << shift), max(max_rank, rank))
+
+    def _max_terms(self, board, max_rank):
+        # 最大值和边角权重两项
+        if not max_rank:
+            return 0
+        max_tile = self.base << (max_rank - 1)
+        corner_weight = 0
+        for shift, weight in CORNER_SHIFTS:
+            if (board >> shift) & 0xF == max_rank:
+                corner_weight += weight
+        return max_tile * self.weights['max_tile'] + corner_weight * max_tile * self.weights['corner']
@@ -0,0 +1,129 @@
+"""
+多进程并行搜索
+
+根节点的每个方向之后是一个机会节点，它的每个子局面（空格 x {2, 4}）都是一棵
+独立的子树。ParallelExpectimax 把这些子树分发到进程池中计算，再按与串行搜索
+相同的顺序合并，因此在不启用概率剪枝时得分和方向与 Expectimax.search 完全一致；
+启用剪枝时各进程的置换表互不共享，命中情况不同可能带来微小差异。
+
+进程池在多次搜索之间复用，每个工作进程保留自己的搜索对象和置换表。
+在Windows上使用时，调用方的入口脚本需要有 if __name__ == "__main__" 保护。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import bitboard
+from .search import Expectimax, SPAWN_TILES
+
+# 工作进程中的搜索对象
+_worker_engine = None
+
+
+def _init_worker(options):
+    global _worker_engine
+    _worker_engine = Expectimax(**options)
+
+
+def _search_subtree(task):
+    board, depth, prob = task
+    _worker_engine.reset_counters()
+    score, _ = _worker_engine.expectimax(board, depth, True, prob)
+    return score, _worker_engine.nodes, _worker_engine.pruned
+
+
+class ParallelExpectimax:
+    """在进程池中并行搜索根节点下的机会节点子树"""
+
+    def __init__(self, workers=None, **options):
+        self.workers = workers or os.cpu_count() or 1
+        self.options = options
+        # 本进程中的搜索对象，用于评估和处理无需分发的小局面
+        self.local = Expectimax(**options)
+        self.depth = self.local.depth
+        self.base = self.local.base
+        self.nodes = 0
+        self.pruned = 0
+        self._pool = None
+
+    def pool(self):
+        """进程池（首次使用时创建）"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             initializer=_init_worker,
+                                             initargs=(self.options,))
+        return self._pool
+
+    def cache_stats(self):
+        """本进程搜索对象的置换表统计（工作进程的置换表不汇总）"""
+        return self.local.cache_stats()
+
+    def close(self):
+        """关闭进程池"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def search(self, board, depth=None):
+        """从位棋盘出发搜索，返回 (得分, 最佳方向)"""
+        if depth is None:
+            depth = self.depth
+        self.nodes = 1
+        self.pruned = 0
+        mask = bitboard.move_mask(board)
+        if depth == 0 or not mask:
+            return self.local.evaluate(board), None
+
+        # 先收集所有方向下机会节点的子树，一次性分块交给进程池
+        plans = []
+        tasks = []
+        for direction in bitboard.MASK_DIRECTIONS[mask]:
+            new_board = bitboard.move(board, direction)
+            subtasks = self._chance_tasks(new_board, depth - 1)
+            plans.append((direction, new_board, len(tasks), subtasks))
+            if subtasks:
+                tasks.extend(subtasks)
+
+        results = []
+        if tasks:
+            chunksize = max(1, len(tasks) // (self.workers * 4))
+            results = list(self.pool().map(_search_subtree, tasks, chunksize=chunksize))
+
+        # 再按方向顺序合并，保证与串行搜索相同的比较顺序
+        max_score = -float('inf')
+        best_move = None
+        for direction, new_board, offset, subtasks in plans:
+            if subtasks is None:
+                # 叶子和终局由本进程直接计算
+                self.local.reset_counters()
+                score, _ = self.local.expectimax(new_board, depth - 1, False)
+                self.nodes += self.local.nodes
+                self.pruned += self.local.pruned
+            else:
+                score = self._combine(subtasks, results[offset:offset + len(subtasks)])
+            if score > max_score:
+                max_score = score
+                best_move = direction
+        return max_score, best_move
+
+    def _chance_tasks(self, board, depth):
+        empty_shifts = bitboard.empty_shifts(board)
+        if depth == 0 or not empty_shifts:
+            return None
+        cell_prob = 1.0 / len(empty_shifts)
+        return [(board | (rank << shift), depth - 1, cell_prob * tile_prob)
+                for shift in empty_shifts for rank, tile_prob in SPAWN_TILES]
+
+    def _combine(self, subtasks, results):
+        # 与 Expectimax 机会节点相同的累加顺序
+        expected_score = 0
+        total_prob = 0
+        tile_probs = [tile_prob for _ in range(len(subtasks) // len(SPAWN_TILES))
+                      for _, tile_prob in SPAWN_TILES]
+        self.nodes += 1
+        for tile_prob, (score, nodes, pruned) in zip(tile_probs, results):
+            self.nodes += nodes
+            self.pruned += pruned
+            expected_score += tile_prob * score
+            total_prob += tile_prob
+        return expected_score / total_prob if total_prob > 0 else 0
@@ -0,0 +1,16 @@
+"""
+本地数据文件位置
+"""
+
+import os
+
+DATA_DIR = os.path.join(os.path.expanduser('~'), '.2048_assistant')
+
+
+def data_path(name):
+    """返回数据目录下的文件路径（必要时创建目录）"""
+    try:
+        os.makedirs(DATA_DIR, exist_ok=True)
+    except OSError:
+        pass
+    return os.path.join(DATA_DIR, name)
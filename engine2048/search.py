@@ -0,0 +1,470 @@
+"""
+Expectimax搜索
+
+搜索全程使用64位位棋盘（见 bitboard.py），叶子节点用逐行查找表评估（见 heuristics.py）。
+搜索结果写入置换表（见 cache.py），同一搜索对象的多次搜索之间共享。
+search_timed 以迭代加深的方式在给定的时间预算内尽可能搜得更深。根节点的方向按上一层
+迭代的得分排序（第一层按历史表中各方向被选为最佳的次数），上一层的最佳方向最先展开；
+子局面在展开到该方向时才生成。某层迭代超时时，只要已经搜完最先展开的方向，
+就采用本层已搜完方向中的最佳者，而不是整层作废。
+
+机会节点会把到达每个子节点的累计概率向下传递；累计概率低于 prob_cutoff 的分支
+不再展开，直接用静态评估代替。置换表不区分累计概率，因此命中的结果可能来自
+不同概率下的剪枝，这是以精度换速度的常见近似。
+
+symmetry为True时，置换表以对称变换下的代表棋盘为键（见 bitboard.canonical），
+互相对称的局面共用同一条记录。只使用评估函数保持不变的变换（见
+HeuristicTables.symmetries），默认权重下评估函数不对称，因此不会合并任何局面。
+
+incremental为True时，子局面是叶子（或可能被概率剪枝）的机会节点会先算好本局面的
+逐行逐列部分和，子局面只重新查放入新方块的那一行和那一列（见
+HeuristicTables.evaluate_spawn），结果与完整评估相同。
+
+afterstate为True时使用后态搜索：机会节点的局面是移动之后、新方块出现之前的
+"后态"，它直接展开每个子局面的四个移动，得到下一层后态，不再经过单独的最大节点；
+到达搜索边界的后态直接评估。同一机会节点的兄弟子局面只在放入新方块的那一行、
+那一列上不同，因此本局面四个方向的移动只算一次，每个子局面只重查那一行或那一列。
+得分与默认搜索相同，只是不为子局面这一层建立置换表记录。
+
+传入 SearchStats（见 stats.py）时记录每层节点数、叶子评估、置换表命中等统计。
+
+search_batched 先遍历一遍搜索树收集全部叶子局面，用 NumPy 一次性批量评估
+（见 batch_eval.py），再用这些分数完成正常的搜索。多出的一遍遍历只有在叶子足够多时
+才划得来：关闭置换表时，空格较多的局面在深度4以上比 search 快约1.4-1.7倍，
+深度3以下或空格很少的局面反而更慢（见 benchmark 中的 expectimax_batched）。
+"""
+
+import time
+
+from . import batch_eval, bitboard
+from .cache import TranspositionTable, make_key
+from .heuristics import HeuristicTables
+from .tables import ROW_LEFT, ROW_RIGHT, COL_UP, COL_DOWN, ROW_CHANGED
+
+# 新方块的阶及其出现概率：90%为最小方块，10%为次小方块
+SPAWN_TILES = ((1, 0.9), (2, 0.1))
+
+# 方向在 DIRECTIONS 中的位置，得分相同时取靠前的方向
+DIRECTION_INDEX = {direction: k for k, direction in enumerate(bitboard.DIRECTIONS)}
+
+# 出现概率最小的新方块，用于判断机会节点的子局面是否可能被剪枝
+MIN_SPAWN_PROB = min(tile_prob for _, tile_prob in SPAWN_TILES)
+
+# 每展开这么多个节点检查一次时间
+TIME_CHECK_INTERVAL = 256
+
+
+class SearchTimeout(Exception):
+    """搜索超出时间预算"""
+
+
+class Expectimax:
+    def __init__(self, depth=3, base=2, cache_mb=32, cache_policy='lru', max_depth=9,
+                 prob_cutoff=0.0001, weights=None, symmetry=True,
+                 incremental=True, afterstate=False):
+        self.depth = depth
+        self.base = base
+        self.heuristic = HeuristicTables(base, weights)
+        self.symmetry = symmetry
+        self._update_symmetries()
+        self.incremental = incremental
+        self.afterstate = afterstate
+        # 迭代加深的深度上限
+        self.max_depth = max_depth
+        # 累计概率低于该值的分支直接静态评估，为0时不剪枝
+        self.prob_cutoff = prob_cutoff
+        # 最近一次搜索访问的节点数和其中被概率剪枝的节点数
+        self.nodes = 0
+        self.pruned = 0
+        # cache_mb为0时不使用置换表
+        self.cache = TranspositionTable(cache_mb, cache_policy) if cache_mb else None
+        self.deadline = None
+        # 返回True时中止当前搜索（用于后台线程取消）
+        self.should_stop = None
+        self._ticks = 0
+        # 批量评估模式下预先算好的叶子得分
+        self._leaf_scores = None
+        # 增量评估时正在展开的子局面：(父局面, 父局面部分和, 位偏移, 阶)
+        self._spawn = None
+        # 当前搜索的统计对象（不统计时为None）和根节点深度
+        self.stats = None
+        self._root_depth = depth
+        # 各方向被选为根节点最佳方向的次数，用于第一层迭代的排序
+        self.history = dict.fromkeys(bitboard.DIRECTIONS, 0)
+        # 上一层完整迭代中根节点各方向的得分，以及本层已搜完方向中的最佳结果
+        self._root_scores = {}
+        self._root_partial = None
+
+    def set_weights(self, **weights):
+        """修改评估权重（置换表中按旧权重算出的结果随之清空）"""
+        self.heuristic.set_weights(**weights)
+        self._update_symmetries()
+        if self.cache:
+            self.cache.clear()
+
+    def _update_symmetries(self):
+        # 置换表合并对称局面时使用的变换，只有恒等变换时为None（不做规范化）
+        symmetries = self.heuristic.symmetries() if self.symmetry else (0,)
+        self.symmetries = symmetries if len(symmetries) > 1 else None
+
+    def canonical(self, board):
+        """置换表和局面库使用的代表棋盘，返回 (代表棋盘, 变换编号)"""
+        if self.symmetries is None:
+            return board, 0
+        return bitboard.canonical(board, self.symmetries)
+
+    def cache_stats(self):
+        """置换表命中统计"""
+        return self.cache.stats() if self.cache else None
+
+    def reset_counters(self):
+        """清零节点计数"""
+        self.nodes = 0
+        self.pruned = 0
+
+    def search(self, board, stats=None):
+        """从位棋盘出发搜索，返回 (得分, 最佳方向)"""
+        start = self._begin(stats)
+        try:
+            return self._search_root(board, self.depth)
+        finally:
+            self._finish(start, self.depth)
+
+    def search_timed(self, board, budget_ms, should_stop=None, on_iteration=None, stats=None):
+        """迭代加深搜索，返回最深一次迭代的结果 (得分, 最佳方向, 深度)
+
+        第一层迭代总会完成，以保证有结果可用；之后每层迭代超出预算或
+        should_stop() 返回True即放弃，置换表中只会留下已完整计算的节点。
+        被放弃的一层已搜完一部分根节点方向时采用其中的最佳者，返回的深度是这一层的深度，
+        并在 stats.partial 中标记。每完成一层迭代都会调用 on_iteration(得分, 最佳方向, 深度)。
+        """
+        start = self._begin(stats)
+        completed = 1
+        try:
+            result = self._search_root(board, 1)
+            if result[1] is None:
+                return result[0], None, completed
+            if on_iteration:
+                on_iteration(result[0], result[1], completed)
+
+            self.deadline = start + budget_ms / 1000.0
+            self.should_stop = should_stop
+            try:
+                for depth in range(2, self.max_depth + 1):
+                    result = self._search_root(board, depth)
+                    completed = depth
+                    if on_iteration:
+                        on_iteration(result[0], result[1], completed)
+            except SearchTimeout:
+                partial = self._root_partial
+                if partial is not None:
+                    result = partial
+                    completed += 1
+                    if self.stats is not None:
+                        self.stats.partial = True
+            return result[0], result[1], completed
+        finally:
+            self.deadline = None
+            self.should_stop = None
+            self._finish(start, completed)
+
+    def _begin(self, stats):
+        # 每次搜索开始时清零计数并挂上统计对象，返回开始时间
+        self.reset_counters()
+        self.stats = stats
+        self._root_scores = {}
+        return time.perf_counter()
+
+    def _finish(self, start, depth):
+        # 超时会在机会节点的循环中途抛出，留下的子局面部分和不能带到下一次评估
+        self._spawn = None
+        stats = self.stats
+        self.stats = None
+        if stats is not None:
+            stats.nodes = self.nodes
+            stats.pruned = self.pruned
+            stats.depth = depth
+            stats.seconds = time.perf_counter() - start
+
+    def _search_root(self, board, depth):
+        # 根节点：按 _root_order 的顺序逐个生成并展开合法方向
+        self._root_depth = depth
+        self._root_partial = None
+        self.nodes += 1
+        stats = self.stats
+        if stats is not None:
+            stats.count_node(0)
+        mask = bitboard.move_mask(board) if depth else 0
+        if not mask:
+            return self.evaluate(board), None
+
+        max_score = -float('inf')
+        best_move = None
+        scores = {}
+        for direction in self._root_order(bitboard.MASK_DIRECTIONS[mask]):
+            if stats is not None:
+                move_start = time.perf_counter()
+            score, _ = self.expectimax(bitboard.move(board, direction), depth - 1, False)
+            if stats is not None:
+                stats.add_root_move(direction, time.perf_counter() - move_start)
+            scores[direction] = score
+            # 得分相同时取 DIRECTIONS 中靠前的方向，结果与展开顺序无关
+            if score > max_score or (score == max_score
+                                     and DIRECTION_INDEX[direction] < DIRECTION_INDEX[best_move]):
+                max_score = score
+                best_move = direction
+            self._root_partial = (max_score, best_move)
+
+        self._root_scores = scores
+        self.history[best_move] += 1
+        return max_score, best_move
+
+    def _root_order(self, directions):
+        """根节点的展开顺序：先按上一层迭代的得分，再按历史表，最后按 DIRECTIONS 顺序"""
+        previous = self._root_scores
+        history = self.history
+        return sorted(directions, key=lambda d: (d not in previous, -previous.get(d, 0),
+                                                 -history[d], DIRECTION_INDEX[d]))
+
+    def search_batched(self, board, depth=None, stats=None):
+        """批量评估模式：先收集所有叶子并用NumPy一次性评估，再完成搜索（适合深度4以上的稀疏局面）"""
+        batch_eval.require_numpy()
+        if depth is None:
+            depth = self.depth
+        leaves = set()
+        self._collect_leaves(board, depth, True, 1.0, set(), leaves)
+        leaves = list(leaves)
+        scores = batch_eval.evaluate_bitboards(leaves, self.base, self.heuristic.weights)
+        self._leaf_scores = dict(zip(leaves, scores))
+        start = self._begin(stats)
+        try:
+            return self._search_root(board, depth)
+        finally:
+            self._leaf_scores = None
+            self._finish(start, depth)
+
+    def _collect_leaves(self, board, depth, is_max, prob, seen, leaves):
+        # 与 expectimax 相同的遍历顺序和剪枝条件，只记录需要评估的局面
+        if is_max and depth > 0 and prob < self.prob_cutoff:
+            leaves.add(board)
+            return
+        key = make_key(board, depth, is_max)
+        if key in seen or (self.cache is not None
+                           and self.cache.contains(self.canonical(board)[0], depth, is_max)):
+            return
+        seen.add(key)
+
+        mask = bitboard.move_mask(board) if depth else 0
+        if not mask:
+            leaves.add(board)
+        elif is_max:
+            for direction in bitboard.MASK_DIRECTIONS[mask]:
+                self._collect_leaves(bitboard.move(board, direction), depth - 1, False,
+                                     prob, seen, leaves)
+        else:
+            empty_shifts = bitboard.empty_shifts(board)
+            if not empty_shifts:
+                leaves.add(board)
+                return
+            cell_prob = prob / len(empty_shifts)
+            for shift in empty_shifts:
+                for rank, tile_prob in SPAWN_TILES:
+                    self._collect_leaves(board | (rank << shift), depth - 1, True,
+                                         cell_prob * tile_prob, seen, leaves)
+
+    def evaluate(self, board):
+        """评估位棋盘"""
+        if self.stats is not None:
+            self.stats.leaf_evals += 1
+        if self._leaf_scores is not None:
+            score = self._leaf_scores.get(board)
+            if score is not None:
+                return score
+        spawn = self._spawn
+        if spawn is not None:
+            parent, partial, shift, rank = spawn
+            if board == parent | (rank << shift):
+                return self.heuristic.evaluate_spawn(parent, partial, shift, rank)
+        return self.heuristic.evaluate(board)
+
+    def expectimax(self, board, depth, is_max, prob=1.0):
+        """Expectimax算法实现（带置换表和概率剪枝），prob为到达该节点的累计概率"""
+        self.nodes += 1
+        stats = self.stats
+        if stats is not None:
+            stats.count_node(self._root_depth - depth)
+        if is_max and depth > 0 and prob < self.prob_cutoff:
+            self.pruned += 1
+            return self.evaluate(board), None
+
+        if self.deadline is not None:
+            self._ticks += 1
+            if self._ticks % TIME_CHECK_INTERVAL == 0 and (
+                    time.perf_counter() > self.deadline
+                    or (self.should_stop is not None and self.should_stop())):
+                raise SearchTimeout()
+
+        cache = self.cache
+        if cache is None:
+            return self._expectimax(board, depth, is_max, prob)
+
+        if self.symmetries is not None:
+            return self._expectimax_symmetric(board, depth, is_max, prob)
+
+        result = cache.get(board, depth, is_max)
+        if result is None:
+            result = self._expectimax(board, depth, is_max, prob)
+            cache.put(board, depth, is_max, result)
+        elif stats is not None:
+            stats.cache_hits += 1
+        return result
+
+    def _expectimax_symmetric(self, board, depth, is_max, prob):
+        # 置换表中保存代表棋盘上的方向，取出时换回当前棋盘上的方向
+        key, sym = bitboard.canonical(board, self.symmetries)
+        result = self.cache.get(key, depth, is_max)
+        if result is None:
+            score, move = self._expectimax(board, depth, is_max, prob)
+            self.cache.put(key, depth, is_max,
+                           (score, bitboard.SYMMETRY_MOVES[sym][move] if move else None))
+            return score, move
+        if self.stats is not None:
+            self.stats.cache_hits += 1
+        score, move = result
+        return score, bitboard.SYMMETRY_INVERSE_MOVES[sym][move] if move else None
+
+    def _expectimax(self, board, depth, is_max, prob):
+        # 基本情况
+        if depth == 0:
+            return self.evaluate(board), None
+
+        if is_max:
+            # 最大化玩家（选择移动），只展开掩码中的合法方向
+            mask = bitboard.move_mask(board)
+            if not mask:
+                return self.evaluate(board), None
+            max_score = -float('inf')
+            best_move = None
+
+            # 没有alpha-beta剪枝，内部节点的展开顺序不影响工作量，按固定顺序展开
+            for direction in bitboard.MASK_DIRECTIONS[mask]:
+                score, _ = self.expectimax(bitboard.move(board, direction), depth - 1, False, prob)
+                if score > max_score:
+                    max_score = score
+                    best_move = direction
+
+            return max_score, best_move
+        else:
+            # 机会节点（随机添加新方块）
+            if self.afterstate:
+                return self._afterstate_chance(board, depth, prob), None
+            # 机会节点的棋盘刚移动过，至少有一个方块；只要还有空格就一定有合法移动，
+            # 没有空格时直接评估，因此这里不需要再做终局检查
+            empty_shifts = bitboard.empty_shifts(board)
+            if not empty_shifts:
+                return self.evaluate(board), None
+
+            expected_score = 0
+            total_prob = 0
+            cell_prob = prob / len(empty_shifts)
+            # 子局面会被直接评估时，先算好本局面的部分和供增量评估
+            partial = None
+            if self.incremental and (depth == 1 or cell_prob * MIN_SPAWN_PROB < self.prob_cutoff):
+                partial = self.heuristic.partial(board)
+
+            for shift in empty_shifts:
+                for rank, tile_prob in SPAWN_TILES:
+                    if partial is not None:
+                        self._spawn = (board, partial, shift, rank)
+                    score, _ = self.expectimax(board | (rank << shift), depth - 1, True,
+                                               cell_prob * tile_prob)
+                    expected_score += tile_prob * score
+                    total_prob += tile_prob
+            if partial is not None:
+                self._spawn = None
+
+            return expected_score / total_prob if total_prob > 0 else 0, None
+
+    def _afterstate_chance(self, board, depth, prob):
+        # 后态模式的机会节点：子局面（最大节点）在这里就地展开，
+        # 移动后的后态再交给 expectimax 作为下一层机会节点
+        empty_shifts = bitboard.empty_shifts(board)
+        if not empty_shifts:
+            return self.evaluate(board)
+
+        cell_prob = prob / len(empty_shifts)
+        child_depth = depth - 1
+        expand = child_depth > 0
+        partial = None
+        if self.incremental and (not expand or cell_prob * MIN_SPAWN_PROB < self.prob_cutoff):
+            partial = self.heuristic.partial(board)
+
+        if expand:
+            # 本局面四个方向的移动结果以及各行、各列的变化标志，所有子局面共用
+            t = bitboard.transpose(board)
+            rows = [(board >> shift) & 0xFFFF for shift in (0, 16, 32, 48)]
+            cols = [(t >> shift) & 0xFFFF for shift in (0, 16, 32, 48)]
+            row_flags = [ROW_CHANGED[row] for row in rows]
+            col_flags = [ROW_CHANGED[col] for col in cols]
+            # 除第k行（列）以外其余三行（列）变化标志的并集
+            rows_other = [row_flags[(k + 1) & 3] | row_flags[(k + 2) & 3] | row_flags[(k + 3) & 3]
+                          for k in range(4)]
+            cols_other = [col_flags[(k + 1) & 3] | col_flags[(k + 2) & 3] | col_flags[(k + 3) & 3]
+                          for k in range(4)]
+            left = bitboard.move(board, 'LEFT')
+            right = bitboard.move(board, 'RIGHT')
+            up = bitboard.move(board, 'UP')
+            down = bitboard.move(board, 'DOWN')
+
+        stats = self.stats
+        ply = self._root_depth - child_depth
+        expected_score = 0
+        total_prob = 0
+        for shift in empty_shifts:
+            i = shift >> 4
+            j = (shift >> 2) & 3
+            for rank, tile_prob in SPAWN_TILES:
+                child_prob = cell_prob * tile_prob
+                # 子局面按一个最大节点计数，与默认搜索的统计口径一致
+                self.nodes += 1
+                if stats is not None:
+                    stats.count_node(ply)
+
+                mask = 0
+                if expand:
+                    if child_prob < self.prob_cutoff:
+                        self.pruned += 1
+                    else:
+                        row = rows[i]
+                        col = cols[j]
+                        new_row = row | (rank << (shift & 0xF))
+                        new_col = col | (rank << (i << 2))
+                        mask = (((rows_other[i] | ROW_CHANGED[new_row]) << 2)
+                                | cols_other[j] | ROW_CHANGED[new_col])
+
+                if not mask:
+                    # 搜索边界、被剪枝或无路可走：直接评估子局面
+                    if partial is not None:
+                        self._spawn = (board, partial, shift, rank)
+                    score = self.evaluate(board | (rank << shift))
+                else:
+                    tile = rank << shift
+                    score = -float('inf')
+                    for direction in bitboard.MASK_DIRECTIONS[mask]:
+                        if direction == 'LEFT':
+                            moved = left ^ ((ROW_LEFT[row] ^ ROW_LEFT[new_row]) << (i << 4))
+                        elif direction == 'RIGHT':
+                            moved = right ^ ((ROW_RIGHT[row] ^ ROW_RIGHT[new_row]) << (i << 4))
+                        elif direction == 'UP':
+                            moved = up ^ tile ^ ((COL_UP[col] ^ COL_UP[new_col]) << (j << 2))
+                        else:
+                            moved = down ^ tile ^ ((COL_DOWN[col] ^ COL_DOWN[new_col]) << (j << 2))
+                        child_score, _ = self.expectimax(moved, depth - 2, False, child_prob)
+                        if child_score > score:
+                            score = child_score
+                expected_score += tile_prob * score
+                total_prob += tile_prob
+        if partial is not None:
+            self._spawn = None
+
+        return expected_score / total_prob if total_prob > 0 else 0
@@ -0,0 +1,132 @@
+"""
+无界面自我对弈模拟器
+
+用引擎的 Expectimax 策略完整地玩若干局游戏，新方块由带种子的随机数生成，
+结果可以复现。统计每秒局数、每秒步数、每秒搜索节点数以及最终最大方块的分布，
+用来客观地衡量引擎改动的效果。
+
+用法:
+    python -m engine2048.simulate --games 10 --seed 1 --depth 3
+    python -m engine2048.simulate --games 5 --budget-ms 50 --json
+    python -m engine2048.simulate --games 5 --workers 4
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import Counter, namedtuple
+
+from . import bitboard
+from .parallel import ParallelExpectimax
+from .search import Expectimax, SPAWN_TILES
+
+GameResult = namedtuple('GameResult', 'score max_tile moves nodes seconds')
+
+
+def spawn_tile(board, rng):
+    """在随机空格放入新方块，没有空格时原样返回"""
+    empty_shifts = bitboard.empty_shifts(board)
+    if not empty_shifts:
+        return board
+    shift = rng.choice(empty_shifts)
+    rank = SPAWN_TILES[0][0] if rng.random() < SPAWN_TILES[0][1] else SPAWN_TILES[1][0]
+    return board | (rank << shift)
+
+
+def play_game(engine, rng, budget_ms=None, max_moves=None):
+    """完整地玩一局，返回 GameResult"""
+    start = time.perf_counter()
+    board = spawn_tile(spawn_tile(0, rng), rng)
+    score = 0
+    moves = 0
+    nodes = 0
+    while max_moves is None or moves < max_moves:
+        if budget_ms:
+            _, move, _ = engine.search_timed(board, budget_ms)
+        else:
+            _, move = engine.search(board)
+        nodes += engine.nodes
+        if move is None:
+            break
+        score += bitboard.move_score(board, move) * engine.base // 2
+        board = spawn_tile(bitboard.move(board, move), rng)
+        moves += 1
+    max_tile = bitboard.value_of(bitboard.max_rank(board), engine.base)
+    return GameResult(score, max_tile, moves, nodes, time.perf_counter() - start)
+
+
+def run(games=10, seed=0, budget_ms=None, max_moves=None, workers=None, **options):
+    """连续模拟多局，返回汇总统计；workers为进程数时使用多进程并行搜索（固定深度）"""
+    if workers and budget_ms:
+        raise ValueError("并行搜索只支持固定深度")
+    rng = random.Random(seed)
+    engine = ParallelExpectimax(workers, **options) if workers else Expectimax(**options)
+    try:
+        results = [play_game(engine, rng, budget_ms, max_moves) for _ in range(games)]
+    finally:
+        if workers:
+            engine.close()
+
+    seconds = sum(r.seconds for r in results)
+    moves = sum(r.moves for r in results)
+    nodes = sum(r.nodes for r in results)
+    tiles = Counter(r.max_tile for r in results)
+    return {
+        'games': games,
+        'seed': seed,
+        'workers': workers or 0,
+        'seconds': seconds,
+        'games_per_second': games / seconds if seconds else 0.0,
+        'moves_per_second': moves / seconds if seconds else 0.0,
+        'nodes_per_second': nodes / seconds if seconds else 0.0,
+        'moves': moves,
+        'nodes': nodes,
+        'average_score': sum(r.score for r in results) / games if games else 0.0,
+        'max_tiles': {str(tile): tiles[tile] for tile in sorted(tiles)},
+        'cache': engine.cache_stats(),
+    }
+
+
+def format_report(stats):
+    """把汇总统计整理成可读文本"""
+    lines = [
+        f"对局数: {stats['games']}  种子: {stats['seed']}  用时: {stats['seconds']:.2f}s",
+        f"每秒局数: {stats['games_per_second']:.3f}",
+        f"每秒步数: {stats['moves_per_second']:.1f}",
+        f"每秒节点数: {stats['nodes_per_second']:.0f}",
+        f"平均得分: {stats['average_score']:.0f}",
+        "最大方块分布:",
+    ]
+    for tile, count in stats['max_tiles'].items():
+        lines.append(f"  {tile:>6}: {count:>4} ({count / stats['games']:.0%})")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="2048 AI 无界面自我对弈模拟")
+    parser.add_argument('--games', type=int, default=10, help="对局数")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--depth', type=int, default=3, help="固定搜索深度")
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help="每步的时间预算（毫秒），设置后改用迭代加深")
+    parser.add_argument('--max-moves', type=int, default=None, help="每局最多步数")
+    parser.add_argument('--prob-cutoff', type=float, default=0.0001, help="概率剪枝阈值")
+    parser.add_argument('--cache-mb', type=float, default=32, help="置换表内存上限，0为关闭")
+    parser.add_argument('--afterstate', action='store_true', help="使用后态搜索")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="多进程并行搜索的进程数，0为单进程（不能与 --budget-ms 同用）")
+    parser.add_argument('--json', action='store_true', help="以JSON格式输出")
+    args = parser.parse_args(argv)
+    if args.workers and args.budget_ms:
+        parser.error("--workers 只支持固定深度，不能与 --budget-ms 同用")
+
+    stats = run(games=args.games, seed=args.seed, budget_ms=args.budget_ms,
+                max_moves=args.max_moves, depth=args.depth,
+                prob_cutoff=args.prob_cutoff, cache_mb=args.cache_mb,
+                afterstate=args.afterstate, workers=args.workers)
+    print(json.dumps(stats, ensure_ascii=False, indent=2) if args.json else format_report(stats))
+
+
+if __name__ == '__main__':
+    main()
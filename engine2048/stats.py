@@ -0,0 +1,66 @@
+"""
+搜索统计
+
+把 SearchStats 传给 Expectimax 的搜索方法即可记录每层展开的节点数、叶子评估次数、
+置换表命中、概率剪枝、到达的最大深度以及每个根节点方向的耗时，
+用来分析为什么有的局面几毫秒就搜完、有的却要几秒。不传时搜索不做任何统计。
+"""
+
+import json
+
+
+class SearchStats:
+    """一次搜索（或一次迭代加深搜索）的统计信息"""
+
+    def __init__(self):
+        # 下标为距根节点的层数（最大节点与机会节点各算一层）
+        self.nodes_per_ply = []
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.cache_hits = 0
+        self.pruned = 0
+        # 结果对应的搜索深度；partial为True表示这一层超时，结果只来自已搜完的部分方向
+        self.depth = 0
+        self.partial = False
+        self.seconds = 0.0
+        # 根节点每个方向的子树耗时（秒），迭代加深时累加各层迭代
+        self.root_moves = {}
+
+    @property
+    def max_ply(self):
+        """实际到达的最大层数"""
+        return len(self.nodes_per_ply) - 1 if self.nodes_per_ply else 0
+
+    def count_node(self, ply):
+        per_ply = self.nodes_per_ply
+        if ply >= len(per_ply):
+            per_ply.extend([0] * (ply + 1 - len(per_ply)))
+        per_ply[ply] += 1
+
+    def add_root_move(self, direction, seconds):
+        self.root_moves[direction] = self.root_moves.get(direction, 0.0) + seconds
+
+    def to_dict(self):
+        return {
+            'nodes': self.nodes,
+            'nodes_per_ply': list(self.nodes_per_ply),
+            'leaf_evals': self.leaf_evals,
+            'cache_hits': self.cache_hits,
+            'pruned': self.pruned,
+            'depth': self.depth,
+            'partial': self.partial,
+            'max_ply': self.max_ply,
+            'seconds': self.seconds,
+            'root_moves': dict(self.root_moves),
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), ensure_ascii=False, **kwargs)
+
+    def summary(self):
+        """适合在建议面板中显示的一行摘要"""
+        text = (f"节点{self.nodes} 叶子{self.leaf_evals} 命中{self.cache_hits} "
+                f"剪枝{self.pruned} 最深{self.max_ply}层 {self.seconds * 1000:.0f}ms")
+        if self.partial:
+            text += " 含部分迭代"
+        return text
@@ -0,0 +1,125 @@
+"""
+行移动查找表
+
+一行4个格子共 16**4 = 65536 种状态。为每种状态预先计算向左/向右移动后的行、
+合并得分以及是否发生变化；上下移动使用把结果展开成列的64位差值表。
+表在第一次构建后保存到本地数据目录，之后启动时直接从磁盘加载。
+"""
+
+import sys
+from array import array
+
+from .paths import data_path
+
+ROW_COUNT = 65536
+MAX_RANK = 15
+
+TABLE_FILE = f'row_tables_v1_{sys.byteorder}.bin'
+
+# 表的顺序与类型码：左移结果、右移结果、左移得分、右移得分、上移差值、下移差值、变化标志
+TABLE_CODES = ('H', 'H', 'I', 'I', 'Q', 'Q', 'B')
+
+# 变化标志位
+CHANGED_LEFT = 1
+CHANGED_RIGHT = 2
+
+
+def reverse_row(row):
+    """将一行的4个格子左右翻转"""
+    return ((row & 0xF) << 12) | ((row & 0xF0) << 4) | ((row >> 4) & 0xF0) | (row >> 12)
+
+
+def unpack_col(row):
+    """把一行展开成位棋盘中的一列（第k个格子移到第k行）"""
+    return (row & 0xF) | ((row & 0xF0) << 12) | ((row & 0xF00) << 24) | ((row & 0xF000) << 36)
+
+
+def move_row_left(row):
+    """将一行向左移动并合并，返回 (新行, 合并得分)"""
+    tiles = [(row >> shift) & 0xF for shift in (0, 4, 8, 12) if (row >> shift) & 0xF]
+    merged = []
+    score = 0
+    k = 0
+    while k < len(tiles):
+        if k + 1 < len(tiles) and tiles[k] == tiles[k + 1] and tiles[k] < MAX_RANK:
+            merged.append(tiles[k] + 1)
+            score += 1 << (tiles[k] + 1)
+            k += 2
+        else:
+            merged.append(tiles[k])
+            k += 1
+    result = 0
+    for k, rank in enumerate(merged):
+        result |= rank << (4 * k)
+    return result, score
+
+
+def build_tables():
+    """逐行计算全部查找表"""
+    left = array('H')
+    left_score = array('I')
+    for row in range(ROW_COUNT):
+        result, score = move_row_left(row)
+        left.append(result)
+        left_score.append(score)
+
+    right = array('H')
+    right_score = array('I')
+    col_up = array('Q')
+    col_down = array('Q')
+    changed = array('B')
+    for row in range(ROW_COUNT):
+        rev = reverse_row(row)
+        result = reverse_row(left[rev])
+        right.append(result)
+        right_score.append(left_score[rev])
+        col_up.append(unpack_col(row) ^ unpack_col(left[row]))
+        col_down.append(unpack_col(row) ^ unpack_col(result))
+        changed.append((CHANGED_LEFT if left[row] != row else 0)
+                       | (CHANGED_RIGHT if result != row else 0))
+
+    return left, right, left_score, right_score, col_up, col_down, changed
+
+
+def save_tables(path, tables):
+    """把查找表写入文件"""
+    with open(path, 'wb') as f:
+        for table in tables:
+            table.tofile(f)
+
+
+def load_tables(path):
+    """从文件读取查找表，并抽样校验内容"""
+    tables = []
+    with open(path, 'rb') as f:
+        for code in TABLE_CODES:
+            table = array(code)
+            table.fromfile(f, ROW_COUNT)
+            tables.append(table)
+        if f.read(1):
+            raise ValueError("查找表文件长度不正确")
+
+    left, _, left_score = tables[0], tables[1], tables[2]
+    for row in range(0, ROW_COUNT, 997):
+        if (left[row], left_score[row]) != move_row_left(row):
+            raise ValueError("查找表文件内容不正确")
+    return tables
+
+
+def _init_tables():
+    path = data_path(TABLE_FILE)
+    try:
+        return load_tables(path)
+    except (OSError, EOFError, ValueError):
+        pass
+
+    tables = build_tables()
+    try:
+        save_tables(path, tables)
+    except OSError:
+        pass  # 无法写入时只在内存中使用
+    return tables
+
+
+(ROW_LEFT, ROW_RIGHT, ROW_SCORE_LEFT, ROW_SCORE_RIGHT,
+ COL_UP, COL_DOWN, ROW_CHANGED) = [table.tolist() for table in _init_tables()]
@@ -0,0 +1,100 @@
+"""
+后台搜索线程
+
+界面线程只负责提交局面和显示结果，搜索在单独的工作线程中进行。
+提交新局面时，正在进行的搜索会被取消并从新局面重新开始，而不是排队等待。
+"""
+
+import threading
+from collections import namedtuple
+
+from .book import search_with_book
+from .stats import SearchStats
+
+# job为提交时返回的编号；final为False表示迭代加深的中间结果；
+# stats为本次搜索的 SearchStats，只随最终结果给出；
+# error为搜索出错时的错误信息，此时结果是final且move为None；
+# 来自局面库的最终结果没有stats
+SearchResult = namedtuple('SearchResult', 'job score move depth final stats error',
+                          defaults=(None,))
+
+
+class SearchWorker:
+    """在后台线程中运行 Expectimax.search_timed
+
+    回调在工作线程中调用，界面代码需要自行切回界面线程
+    （Tk 用队列加 after 轮询，Kivy 用 Clock.schedule_once）。
+    同一个搜索对象只在工作线程中使用，因此置换表无需加锁。
+    """
+
+    def __init__(self, engine, budget_ms=200, book=None):
+        self.engine = engine
+        self.budget_ms = budget_ms
+        # 给出局面库时先查库，搜索结果也存入库中（见 book.search_with_book）
+        self.book = book
+        self._cond = threading.Condition()
+        self._pending = None
+        self._job = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='search-worker', daemon=True)
+        self._thread.start()
+
+    def submit(self, board, callback, afterstate=None):
+        """提交新局面（取消正在进行的搜索），返回本次任务编号
+
+        afterstate 不为None时在工作线程中设置搜索对象的后态搜索开关后再搜索。
+        """
+        with self._cond:
+            self._job += 1
+            self._pending = (self._job, board, callback, afterstate)
+            self._cond.notify()
+            return self._job
+
+    def cancel(self):
+        """取消正在进行和尚未开始的搜索"""
+        with self._cond:
+            self._job += 1
+            self._pending = None
+
+    def stop(self):
+        """取消搜索并结束工作线程"""
+        with self._cond:
+            self._job += 1
+            self._pending = None
+            self._closed = True
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                job, board, callback, afterstate = self._pending
+                self._pending = None
+
+            if afterstate is not None:
+                self.engine.afterstate = afterstate
+
+            def stale():
+                return self._job != job
+
+            def on_iteration(score, move, depth):
+                if not stale():
+                    callback(SearchResult(job, score, move, depth, False, None))
+
+            stats = SearchStats()
+            try:
+                score, move, depth, from_book = search_with_book(
+                    self.engine, board, self.budget_ms, self.book, stats,
+                    should_stop=stale, on_iteration=on_iteration)
+            except Exception as e:
+                # 出错也要给出最终结果，界面才不会一直停在"正在计算"
+                print(f"后台搜索出错: {e}")
+                if not stale():
+                    callback(SearchResult(job, None, None, 0, True, None, str(e)))
+                continue
+            if not stale():
+                callback(SearchResult(job, score, move, depth, True,
+                                      None if from_book else stats))
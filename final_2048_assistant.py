@@ -2,6 +2,11 @@ import tkinter as tk
 import time
 import random
 
+from engine2048 import bitboard
+from engine2048.book import open_book, search_with_book
+from engine2048.search import Expectimax
+from engine2048.stats import SearchStats
+
 class Final2048Assistant:
     def __init__(self, root):
         self.root = root
@@ -18,6 +23,11 @@ class Final2048Assistant:
         
         # AI相关
         self.directions = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+        self.engine = Expectimax(depth=3)
+        # 搜索过的局面保存在本地局面库中，重复出现时直接给出结果
+        self.book = open_book(self.engine)
+        # 每次AI建议的搜索时间预算（毫秒）
+        self.time_budget_ms = 200
         
         self.setup_ui()
         
@@ -30,6 +40,10 @@ class Final2048Assistant:
         
         self.ai_btn = tk.Button(control_frame, text="AI建议", command=self.get_ai_suggestion)
         self.ai_btn.pack(side=tk.LEFT, padx=5)
+
+        # 后态搜索：得分与普通搜索相同，兄弟子局面共用移动计算，速度更快
+        self.afterstate_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(control_frame, text="后态搜索", variable=self.afterstate_var).pack(side=tk.LEFT, padx=5)
         
         # 游戏状态显示
         status_frame = tk.LabelFrame(self.root, text="游戏状态", padx=10, pady=10)
@@ -165,13 +179,21 @@ class Final2048Assistant:
         
     def get_ai_suggestion(self):
         """获取AI建议 - 使用高级Expectimax算法"""
-        best_move = self.expectimax(
-            tuple(tuple(row) for row in self.game_board), 3, True
-        )[1]
+        self.engine.afterstate = self.afterstate_var.get()
+        try:
+            board = bitboard.from_grid(self.game_board)
+        except ValueError as e:
+            self.suggestion_label.config(text=f"棋盘数值无效: {e}")
+            return
+            
+        stats = SearchStats()
+        _, best_move, depth, from_book = search_with_book(
+            self.engine, board, self.time_budget_ms, self.book, stats)
+        note = "局面库" if from_book else stats.summary()
         
         if best_move is None:
             # 如果没有有效移动，检查是否有有效移动
-            valid_moves = self.get_valid_moves(self.game_board)
+            valid_moves = bitboard.valid_moves(board)
             if valid_moves:
                 best_move = valid_moves[0]
             else:
@@ -184,142 +206,7 @@ class Final2048Assistant:
             'LEFT': '左',
             'RIGHT': '右'
         }
-        self.suggestion_label.config(text=f"建议方向: {direction_text[best_move]} ({best_move})")
-        
-    def expectimax(self, board, depth, is_max):
-        """Expectimax算法实现"""
-        # 转换为列表以便操作
-        board_list = [list(row) for row in board]
-        
-        # 基本情况
-        if depth == 0 or not self.get_valid_moves(board_list):
-            return self.evaluate_board(board_list), None
-            
-        if is_max:
-            # 最大化玩家（选择移动）
-            max_score = -float('inf')
-            best_move = None
-            
-            for direction in self.directions:
-                new_board = self.move_board_direction(board_list, direction)
-                if new_board != board_list:  # 如果移动有效
-                    score, _ = self.expectimax(
-                        tuple(tuple(row) for row in new_board), 
-                        depth - 1, False
-                    )
-                    if score > max_score:
-                        max_score = score
-                        best_move = direction
-                        
-            return max_score, best_move
-        else:
-            # 机会节点（随机添加新方块）
-            empty_cells = self.get_empty_cells(board_list)
-            if not empty_cells:
-                return self.evaluate_board(board_list), None
-                
-            expected_score = 0
-            
-            # 对每个空位置尝试放置2(90%概率)和4(10%概率)
-            total_combinations = len(empty_cells) * 2  # 2种数字(2和4)
-            for i, j in empty_cells:
-                for value, prob in [(2, 0.9), (4, 0.1)]:
-                    new_board = [row[:] for row in board_list]
-                    new_board[i][j] = value
-                    score, _ = self.expectimax(
-                        tuple(tuple(row) for row in new_board), 
-                        depth - 1, True
-                    )
-                    expected_score += prob * score
-                    
-            return expected_score, None
-            
-    def get_empty_cells(self, board):
-        """获取所有空单元格的位置"""
-        empty_cells = []
-        for i in range(4):
-            for j in range(4):
-                if board[i][j] == 0:
-                    empty_cells.append((i, j))
-        return empty_cells
-        
-    def evaluate_board(self, board):
-        """评估棋盘得分 - 使用多种启发式方法"""
-        score = 0
-        
-        # 1. 空格奖励
-        empty_count = len(self.get_empty_cells(board))
-        score += empty_count * 1000
-        
-        # 2. 最大值奖励
-        max_tile = max(max(row) for row in board)
-        score += max_tile * 10
-        
-        # 3. 单调性评估
-        score += self.calculate_monotonicity(board) * 100
-        
-        # 4. 平滑度评估
-        score -= self.calculate_smoothness(board) * 10
-        
-        # 5. 边角权重（鼓励将大数字放在角落）
-        score += self.calculate_corner_weight(board) * 10000
-        
-        return score
-        
-    def calculate_monotonicity(self, board):
-        """计算单调性"""
-        # 水平单调性
-        hori_monotonicity = 0
-        for i in range(4):
-            for j in range(3):
-                if board[i][j] >= board[i][j+1]:
-                    hori_monotonicity += board[i][j] - board[i][j+1]
-                    
-        # 垂直单调性
-        vert_monotonicity = 0
-        for j in range(4):
-            for i in range(3):
-                if board[i][j] >= board[i+1][j]:
-                    vert_monotonicity += board[i][j] - board[i+1][j]
-                    
-        return hori_monotonicity + vert_monotonicity
-        
-    def calculate_smoothness(self, board):
-        """计算平滑度"""
-        smoothness = 0
-        for i in range(4):
-            for j in range(4):
-                if board[i][j] != 0:
-                    # 检查右边
-                    if j < 3 and board[i][j+1] != 0:
-                        smoothness += abs(board[i][j] - board[i][j+1])
-                    # 检查下边
-                    if i < 3 and board[i+1][j] != 0:
-                        smoothness += abs(board[i][j] - board[i+1][j])
-        return smoothness
-        
-    def calculate_corner_weight(self, board):
-        """计算角落权重"""
-        # 鼓励将最大值放在角落
-        max_tile = max(max(row) for row in board)
-        corner_score = 0
-        
-        # 检查四个角落
-        corners = [(0, 0), (0, 3), (3, 0), (3, 3)]
-        for i, (x, y) in enumerate(corners):
-            if board[x][y] == max_tile:
-                corner_score += (4 - i) * max_tile  # 给不同角落不同的权重
-                
-        return corner_score
-        
-    def get_valid_moves(self, board):
-        """获取所有有效的移动方向"""
-        valid_moves = []
-        for direction in self.directions:
-            new_board = self.move_board_direction(board, direction)
-            if new_board != board:
-                valid_moves.append(direction)
-        return valid_moves
+        self.suggestion_label.config(text=f"建议方向: {direction_text[best_move]} ({best_move}) 深度{depth}\n{note}")
         
     def execute_move(self, direction):
         """执行移动操作"""
@@ -348,55 +235,7 @@ class Final2048Assistant:
             
     def move_board_direction(self, board, direction):
         """根据方向移动棋盘"""
-        # 确保创建新棋盘的完整副本
-        new_board = [[board[i][j] for j in range(4)] for i in range(4)]
-        
-        if direction == 'LEFT':
-            for i in range(4):
-                # 移除0并合并相同数字
-                row = [x for x in new_board[i] if x != 0]
-                for j in range(len(row)-1):
-                    if row[j] == row[j+1]:
-                        row[j] *= 2
-                        row[j+1] = 0
-                row = [x for x in row if x != 0]
-                # 补齐0
-                row += [0] * (4 - len(row))
-                new_board[i] = row
-        elif direction == 'RIGHT':
-            for i in range(4):
-                row = [x for x in new_board[i] if x != 0]
-                for j in range(len(row)-1, 0, -1):
-                    if row[j] == row[j-1]:
-                        row[j] *= 2
-                        row[j-1] = 0
-                row = [x for x in row if x != 0]
-                row = [0] * (4 - len(row)) + row
-                new_board[i] = row
-        elif direction == 'UP':
-            for j in range(4):
-                col = [new_board[i][j] for i in range(4) if new_board[i][j] != 0]
-                for i in range(len(col)-1):
-                    if col[i] == col[i+1]:
-                        col[i] *= 2
-                        col[i+1] = 0
-                col = [x for x in col if x != 0]
-                col += [0] * (4 - len(col))
-                for i in range(4):
-                    new_board[i][j] = col[i]
-        elif direction == 'DOWN':
-            for j in range(4):
-                col = [new_board[i][j] for i in range(4) if new_board[i][j] != 0]
-                for i in range(len(col)-1, 0, -1):
-                    if col[i] == col[i-1]:
-                        col[i] *= 2
-                        col[i-1] = 0
-                col = [x for x in col if x != 0]
-                col = [0] * (4 - len(col)) + col
-                for i in range(4):
-                    new_board[i][j] = col[i]
-                    
-        return new_board
+        return bitboard.move_grid(board, direction)
 
 if __name__ == "__main__":
     root = tk.Tk()
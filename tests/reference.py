@@ -0,0 +1,101 @@
+"""
+测试用的列表版参照实现
+
+用 heuristics 中逐格计算的评估项和 bitboard._move_grid_slow 写成最直接的列表版
+expectimax，作为位棋盘引擎各种搜索方式的参照。随机局面使用固定种子，结果可重复。
+"""
+
+import random
+
+import pytest
+
+from engine2048 import bitboard
+from engine2048.heuristics import (DEFAULT_WEIGHTS, calculate_corner_weight,
+                                   calculate_monotonicity, calculate_smoothness,
+                                   get_empty_cells)
+from engine2048.search import SPAWN_TILES
+
+BASES = (1, 2)
+
+BOARDS_PER_CASE = 12
+
+
+def random_grid(rng, base):
+    """随机局面：空格多少不一，偶尔没有空格"""
+    empty_prob = rng.choice((0.0, 0.2, 0.5, 0.8))
+    values = []
+    for _ in range(16):
+        rank = 0 if rng.random() < empty_prob else rng.randint(1, 9)
+        values.append(bitboard.value_of(rank, base))
+    if not any(values):
+        values[rng.randrange(16)] = base
+    return [values[i:i + 4] for i in range(0, 16, 4)]
+
+
+def cases(seed, per_base=BOARDS_PER_CASE):
+    """按base产生 (base, 局面) 的随机序列"""
+    rng = random.Random(seed)
+    for base in BASES:
+        for _ in range(per_base):
+            yield base, random_grid(rng, base)
+
+
+def reference_evaluate(grid, weights=None):
+    w = dict(DEFAULT_WEIGHTS, **(weights or {}))
+    max_tile = max(max(row) for row in grid)
+    return (len(get_empty_cells(grid)) * w['empty']
+            + max_tile * w['max_tile']
+            + calculate_monotonicity(grid) * w['monotonicity']
+            - calculate_smoothness(grid) * w['smoothness']
+            + calculate_corner_weight(grid) * w['corner'])
+
+
+def reference_moves(grid):
+    moves = []
+    for direction in bitboard.DIRECTIONS:
+        moved = bitboard._move_grid_slow(grid, direction)
+        if moved != grid:
+            moves.append((direction, moved))
+    return moves
+
+
+def reference_max(grid, depth, base, weights=None):
+    """列表版最大节点，返回 (得分, 方向)，得分相同时取 DIRECTIONS 中靠前的方向"""
+    moves = reference_moves(grid) if depth else []
+    if not moves:
+        return reference_evaluate(grid, weights), None
+    best_score = -float('inf')
+    best_move = None
+    for direction, moved in moves:
+        score = reference_chance(moved, depth - 1, base, weights)
+        if score > best_score:
+            best_score = score
+            best_move = direction
+    return best_score, best_move
+
+
+def reference_chance(grid, depth, base, weights=None):
+    empty = get_empty_cells(grid)
+    if depth == 0 or not empty:
+        return reference_evaluate(grid, weights)
+    total = 0.0
+    for i, j in empty:
+        for rank, tile_prob in SPAWN_TILES:
+            child = [list(row) for row in grid]
+            child[i][j] = bitboard.value_of(rank, base)
+            total += tile_prob * reference_max(child, depth - 1, base, weights)[0]
+    return total / len(empty)
+
+
+def assert_same(result, grid, depth, base, weights=None):
+    """搜索结果 (得分, 方向, ...) 与参照一致；只有得分在浮点误差内相同的方向才允许不同"""
+    score, move = result[0], result[1]
+    expected_score, expected_move = reference_max(grid, depth, base, weights)
+    assert score == pytest.approx(expected_score, rel=1e-9, abs=1e-6), grid
+    if expected_move is None:
+        assert move is None, grid
+    else:
+        moves = dict(reference_moves(grid))
+        assert move in moves, grid
+        assert reference_chance(moves[move], depth - 1, base, weights) == pytest.approx(
+            expected_score, rel=1e-9, abs=1e-6), grid
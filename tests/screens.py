@@ -0,0 +1,78 @@
+"""
+测试用的合成棋盘画面
+
+按界面调色板给每个格子涂上背景色，格子中间画一个随数值变化的图案代替数字笔画
+（见 draw_glyph），格子之间留出缝隙，与真实截图的结构相同。
+"""
+
+import pytest
+
+# 棋盘识别依赖 numpy，没有安装时跳过导入本模块的测试
+np = pytest.importorskip('numpy')
+
+PALETTE = {
+    0: '#CDC1B4',
+    2: '#EEE4DA',
+    4: '#EDE0C8',
+    8: '#F2B179',
+    16: '#F59563',
+    32: '#F67C5F',
+    64: '#F65E3B',
+    128: '#EDCF72',
+    256: '#EDCC61',
+    512: '#EDC850',
+    1024: '#EDC53F',
+    2048: '#EDC22E',
+}
+
+# 调色板以外的数值共用的默认色
+SHARED_COLOR = '#3C3A32'
+
+GAP_COLOR = (187, 173, 160)
+DARK_INK = (119, 110, 101)
+LIGHT_INK = (249, 246, 242)
+
+# 格子边长与缝隙宽度（像素）
+CELL = 100
+GAP = 6
+
+
+def rgb(color):
+    color = color.lstrip('#')
+    return tuple(int(color[k:k + 2], 16) for k in (0, 2, 4))
+
+
+def render(board, colors=None, cell=CELL):
+    """4x4棋盘 -> 画面（H x W x 3 的uint8数组）；colors可覆盖个别数值的背景色"""
+    colors = dict(colors or {})
+    image = np.empty((cell * 4, cell * 4, 3), dtype=np.uint8)
+    image[:] = GAP_COLOR
+    gap = max(1, GAP * cell // CELL)
+    for i, row in enumerate(board):
+        for j, value in enumerate(row):
+            color = colors.get(value) or PALETTE.get(value, SHARED_COLOR)
+            y, x = i * cell, j * cell
+            image[y + gap:y + cell - gap, x + gap:x + cell - gap] = (
+                rgb(color) if isinstance(color, str) else color)
+            if value:
+                draw_glyph(image[y:y + cell, x:x + cell], value)
+    return image
+
+
+def draw_glyph(cell_image, value):
+    """在格子中间画一个方框代替数字，框内按 log2(value) 的二进制位涂满对应的四分之一
+
+    与真实画面一样，小数值用深色字，8及以上用浅色字。
+    """
+    size = cell_image.shape[0]
+    ink = DARK_INK if value < 8 else LIGHT_INK
+    top = size * 5 // 16
+    side = size * 3 // 8
+    width = max(1, size // 40)
+    box = cell_image[top:top + side, top:top + side]
+    box[:width] = box[-width:] = box[:, :width] = box[:, -width:] = ink
+    half = side // 2
+    rank = value.bit_length() - 1
+    for bit, (y, x) in enumerate(((0, 0), (0, half), (half, 0), (half, half))):
+        if rank >> bit & 1:
+            box[y + 2 * width:y + half - width, x + 2 * width:x + half - width] = ink
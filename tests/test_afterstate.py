@@ -0,0 +1,40 @@
+"""
+后态搜索与列表版参照实现的一致性检查
+"""
+
+import pytest
+
+from engine2048 import Expectimax, bitboard
+from reference import BASES, assert_same, cases
+
+WEIGHTS = (None, {'corner': 0}, {'empty': 50, 'smoothness': 0})
+
+
+@pytest.mark.parametrize('weights', WEIGHTS)
+@pytest.mark.parametrize('depth', (1, 2, 3))
+def test_afterstate_search_matches_reference(depth, weights):
+    engines = {base: Expectimax(depth, base, prob_cutoff=0, weights=weights, afterstate=True)
+               for base in BASES}
+    for base, grid in cases(40 + depth, per_base=8):
+        result = engines[base].search(bitboard.from_grid(grid, base))
+        assert_same(result, grid, depth, base, weights)
+
+
+@pytest.mark.parametrize('depth', (2, 3))
+def test_afterstate_matches_default_search_with_pruning(depth):
+    # 开启概率剪枝时两种搜索剪掉的分支相同，得分也应相同
+    for base, grid in cases(50 + depth, per_base=8):
+        board = bitboard.from_grid(grid, base)
+        expected = Expectimax(depth, base, cache_mb=0, prob_cutoff=0.01).search(board)
+        result = Expectimax(depth, base, cache_mb=0, prob_cutoff=0.01,
+                            afterstate=True).search(board)
+        assert result[0] == pytest.approx(expected[0], rel=1e-9), grid
+        assert result[1] == expected[1], grid
+
+
+def test_afterstate_timed_search():
+    engine = Expectimax(base=2, afterstate=True)
+    board = bitboard.from_grid([[2, 4, 8, 16], [0, 2, 0, 4], [0, 0, 0, 2], [0, 0, 0, 0]])
+    _, move, depth = engine.search_timed(board, 50)
+    assert move in bitboard.valid_moves(board)
+    assert depth >= 1
@@ -0,0 +1,64 @@
+"""批量分析的局面解析与命令行"""
+
+import json
+
+import pytest
+
+from engine2048 import analyze, bitboard
+
+GRID = [[2, 0, 0, 0], [0, 4, 0, 0], [0, 0, 0, 0], [0, 0, 0, 2]]
+BOARD = bitboard.from_grid(GRID)
+
+
+@pytest.mark.parametrize('text', [
+    json.dumps(GRID),
+    json.dumps([value for row in GRID for value in row]),
+    json.dumps({'board': GRID}),
+    f'{BOARD:016x}',
+    f'0x{BOARD:016X}',
+])
+def test_parse_board_formats(text):
+    assert analyze.parse_board(text) == BOARD
+
+
+def test_parse_board_base_one():
+    assert analyze.parse_board(json.dumps([[1, 2, 0, 0]] + [[0] * 4] * 3), base=1) == 0x21
+
+
+@pytest.mark.parametrize('text', [
+    '-123456789abcdef',
+    '+123456789abcdef',
+    '0000_0000_000011',
+    '0x-23456789abcdef',
+    '123456789abcdef',
+    '123456789abcdefg',
+    '[2.0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]',
+    '["2", 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]',
+    '[true, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]',
+    '[3, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]',
+    '[2, 0, 0]',
+    '{"grid": []}',
+    '[2, 0, 0',
+])
+def test_parse_board_rejects_bad_lines(text):
+    with pytest.raises(ValueError):
+        analyze.parse_board(text)
+
+
+def test_read_boards_reports_line_numbers():
+    lines = ['# comment', '', f'{BOARD:016x}', '-123456789abcdef', json.dumps(GRID)]
+    boards, errors = analyze.read_boards(lines)
+    assert boards == [(3, BOARD), (5, BOARD)]
+    assert [line_no for line_no, _ in errors] == [4]
+
+
+def test_main_writes_results_and_fails_on_bad_lines(tmp_path, capsys):
+    source = tmp_path / 'boards.txt'
+    source.write_text(f'{BOARD:016x}\n[2.0, 0]\n', encoding='utf-8')
+    output = tmp_path / 'out.jsonl'
+    code = analyze.main([str(source), '-o', str(output), '--workers', '1', '--depth', '1'])
+    assert code == 1
+    assert '第2行' in capsys.readouterr().err
+    results = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert [(r['line'], r['board']) for r in results] == [(1, f'{BOARD:016x}')]
+    assert results[0]['move'] in bitboard.valid_moves(BOARD)
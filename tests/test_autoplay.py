@@ -0,0 +1,145 @@
+"""流水线自动游戏（用合成画面模拟游戏窗口）"""
+
+import threading
+
+from screens import PALETTE, SHARED_COLOR, render
+from engine2048 import bitboard
+from vision2048 import AutoPlayer, FrameTracker, TileClassifier
+
+TIMEOUT = 10
+
+START = [[2, 0, 0, 0], [0, 0, 0, 0], [0, 0, 4, 0], [0, 0, 0, 0]]
+
+
+def play(grid, move):
+    """移动后在第一个空格放入2"""
+    grid = bitboard.move_grid(grid, move)
+    for row in grid:
+        if 0 in row:
+            row[row.index(0)] = 2
+            break
+    return grid
+
+
+class Game:
+    """模拟的游戏窗口：按键后画面立即变为 play 的结果"""
+
+    def __init__(self):
+        self.grid = START
+        self.lock = threading.Lock()
+        self.presses = []
+
+    def grab(self):
+        with self.lock:
+            return render(self.grid)
+
+    def press(self, move):
+        with self.lock:
+            self.presses.append(move)
+            self.grid = play(self.grid, move)
+
+
+class Recorder:
+    """记录 on_move 和 on_stop 的调用"""
+
+    def __init__(self):
+        self.moves = []
+        self.errors = []
+        self.stopped = threading.Event()
+
+    def on_move(self, board, move, settled):
+        self.moves.append((board, move, settled))
+
+    def on_stop(self, error):
+        self.errors.append(error)
+        self.stopped.set()
+
+
+def make_player(game, choose_move, recorder, recognize=None):
+    tracker = FrameTracker(TileClassifier(PALETTE, shared_colors=[SHARED_COLOR]))
+    recognize = recognize or (lambda frame: tracker.update(frame)[0])
+    return AutoPlayer(game.grab, recognize, choose_move, game.press, max_rate=0,
+                      settle_timeout=1.0, poll_interval=0.001,
+                      on_move=recorder.on_move, on_stop=recorder.on_stop)
+
+
+def first_moves(count):
+    """前count步选择第一个合法方向，之后返回None结束"""
+    chosen = []
+
+    def choose_move(board):
+        if len(chosen) == count:
+            return None
+        move = bitboard.valid_moves(bitboard.from_grid(board))[0]
+        chosen.append(board)
+        return move
+    return choose_move
+
+
+def test_plays_until_no_move():
+    game = Game()
+    recorder = Recorder()
+    player = make_player(game, first_moves(5), recorder)
+    player.start()
+    assert recorder.stopped.wait(TIMEOUT)
+    player.join(TIMEOUT)
+    assert not player.is_alive()
+    assert recorder.errors == [None]
+    assert player.moves == 5 and len(game.presses) == 5
+    # 每一步都识别出按键之前的画面，且画面已经稳定
+    grid = START
+    for board, move, settled in recorder.moves:
+        assert board == grid and settled
+        grid = play(grid, move)
+    assert set(player.latency()) == {'capture', 'recognize', 'search', 'press'}
+
+
+def test_stop_during_search_does_not_press():
+    game = Game()
+    recorder = Recorder()
+    holder = []
+
+    def choose_move(board):
+        holder[0].stop()
+        return 'DOWN'
+
+    player = make_player(game, choose_move, recorder)
+    holder.append(player)
+    player.start()
+    assert recorder.stopped.wait(TIMEOUT)
+    player.join(TIMEOUT)
+    assert game.presses == []
+    assert recorder.moves == []
+
+
+def test_error_stops_player():
+    game = Game()
+    recorder = Recorder()
+
+    def recognize(frame):
+        raise RuntimeError("识别失败")
+
+    player = make_player(game, first_moves(5), recorder, recognize)
+    player.start()
+    assert recorder.stopped.wait(TIMEOUT)
+    player.join(TIMEOUT)
+    assert not player.is_alive()
+    assert isinstance(recorder.errors[0], RuntimeError)
+    assert game.presses == []
+
+
+def test_restart_after_stop():
+    game = Game()
+    recorder = Recorder()
+    player = make_player(game, first_moves(2), recorder)
+    player.start()
+    assert recorder.stopped.wait(TIMEOUT)
+    player.join(TIMEOUT)
+
+    recorder.stopped.clear()
+    player.choose_move = first_moves(1)
+    player.start()
+    assert recorder.stopped.wait(TIMEOUT)
+    player.join(TIMEOUT)
+    assert player.moves == 1
+    assert len(game.presses) == 3
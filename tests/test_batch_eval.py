@@ -0,0 +1,23 @@
+"""NumPy批量评估与批量搜索"""
+
+import pytest
+
+from engine2048 import Expectimax, batch_eval, bitboard
+from reference import BASES, assert_same, cases, reference_evaluate
+
+pytest.importorskip('numpy')
+
+
+def test_evaluate_bitboards_matches_reference():
+    for base in BASES:
+        grids = [grid for case_base, grid in cases(30) if case_base == base]
+        boards = [bitboard.from_grid(grid, base) for grid in grids]
+        assert batch_eval.evaluate_bitboards(boards, base) == [reference_evaluate(g) for g in grids]
+
+
+@pytest.mark.parametrize('depth', (1, 2, 3))
+def test_search_batched_matches_reference(depth):
+    engines = {base: Expectimax(depth, base, prob_cutoff=0) for base in BASES}
+    for base, grid in cases(10 + depth):
+        result = engines[base].search_batched(bitboard.from_grid(grid, base))
+        assert_same(result, grid, depth, base)
@@ -0,0 +1,77 @@
+"""整盘二值化与格子切分"""
+
+import os
+
+import pytest
+
+from screens import np, render
+from vision2048 import binarize, cell_images, cell_samples
+from vision2048.classifier import CELL_MARGIN, grayscale
+
+Image = pytest.importorskip('PIL.Image')
+
+SCREENSHOT = os.path.join(os.path.dirname(__file__), os.pardir, 'screenshot.png')
+
+
+def pil_binarize(pixels, threshold=128):
+    """原先逐像素的做法：PIL 转 'L' 模式后按阈值映射"""
+    image = Image.fromarray(pixels).convert('L')
+    return np.asarray(image.point(lambda x: 0 if x < threshold else 255, 'L'))
+
+
+def test_binarize_matches_pil_on_random_pixels():
+    rng = np.random.default_rng(1)
+    pixels = rng.integers(0, 256, size=(64, 64, 3), dtype=np.uint8)
+    for threshold in (1, 64, 128, 200, 255):
+        assert np.array_equal(binarize(pixels, threshold), pil_binarize(pixels, threshold))
+
+
+def test_binarize_matches_pil_near_threshold():
+    # 灰度恰好落在阈值附近的颜色最容易因舍入不同而出错
+    colors = [(r, g, b) for r in range(118, 139) for g in range(118, 139) for b in (0, 127, 128, 255)]
+    pixels = np.array(colors, dtype=np.uint8).reshape(1, -1, 3)
+    assert np.array_equal(binarize(pixels), pil_binarize(pixels))
+
+
+def test_binarize_matches_pil_on_screenshot():
+    pixels = np.asarray(Image.open(SCREENSHOT).convert('RGB'))
+    result = binarize(pixels)
+    assert result.dtype == np.uint8
+    assert np.array_equal(result, pil_binarize(pixels))
+
+
+def test_binarize_gray_and_rgba():
+    gray = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    assert np.array_equal(binarize(gray), np.where(gray < 128, 0, 255))
+    rgba = np.dstack([np.full((4, 4), 200, np.uint8)] * 3 + [np.zeros((4, 4), np.uint8)])
+    assert (binarize(rgba) == 255).all()
+
+
+def test_grayscale_matches_luma():
+    pixels = np.array([[[255, 0, 0], [0, 255, 0], [0, 0, 255]]], dtype=np.uint8)
+    assert np.allclose(grayscale(pixels), [[76.245, 149.685, 29.07]])
+
+
+def test_cell_images_are_views():
+    image = render([[2, 4, 8, 16]] * 4)
+    cells = cell_images(image)
+    assert len(cells) == 16
+    assert all(cell.shape == (100 - 2 * CELL_MARGIN, 100 - 2 * CELL_MARGIN, 3) for cell in cells)
+    assert all(np.shares_memory(cell, image) for cell in cells)
+    # 第1行第2列的格子从 (100 + 边距, 200 + 边距) 开始
+    assert np.array_equal(cells[6], image[100 + CELL_MARGIN:200 - CELL_MARGIN,
+                                          200 + CELL_MARGIN:300 - CELL_MARGIN])
+
+
+def test_cell_slicing_ignores_leftover_pixels():
+    # 尺寸不能被4整除时多出的行列被忽略
+    image = render([[2, 4, 8, 16]] * 4)
+    padded = np.concatenate([image, np.zeros((3, 400, 3), np.uint8)])
+    assert all(np.array_equal(a, b) for a, b in zip(cell_images(padded), cell_images(image)))
+    assert np.array_equal(cell_samples(padded), cell_samples(image))
+
+
+def test_small_cells_use_smaller_margin():
+    # 边距不超过格子边长的1/4，至少保留格子中间的一半
+    cells = cell_images(render([[2] * 4] * 4, cell=32))
+    assert all(cell.shape == (16, 16, 3) for cell in cells)
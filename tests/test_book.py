@@ -0,0 +1,119 @@
+"""
+局面库的存取、淘汰和对称合并
+"""
+
+import itertools
+
+import pytest
+
+from engine2048 import Expectimax, bitboard, book, search
+from engine2048.book import PositionBook, open_book, search_with_book
+from engine2048.stats import SearchStats
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # 每次取时间都递增，记录的使用先后与调用顺序一致
+    ticks = itertools.count(1)
+    monkeypatch.setattr(book.time, 'time', lambda: float(next(ticks)))
+
+
+def test_lookup_returns_stored_result(tmp_path):
+    positions = PositionBook(str(tmp_path / 'book.sqlite3'))
+    assert positions.lookup(0x1) is None
+    positions.store(0x1, 'LEFT', 12.5, 3)
+    assert positions.lookup(0x1) == (12.5, 'LEFT', 3)
+    assert positions.lookup(0x1, min_depth=4) is None
+    assert positions.stats()['hits'] == 1
+    assert positions.stats()['misses'] == 2
+    positions.close()
+
+
+def test_store_keeps_deeper_result(tmp_path):
+    positions = PositionBook(str(tmp_path / 'book.sqlite3'))
+    positions.store(0x1, 'UP', 5.0, 4)
+    positions.store(0x1, 'LEFT', 1.0, 2)
+    assert positions.lookup(0x1) == (5.0, 'UP', 4)
+    positions.store(0x1, 'DOWN', 7.0, 5)
+    assert positions.lookup(0x1) == (7.0, 'DOWN', 5)
+    positions.close()
+
+
+def test_variants_are_separate(tmp_path):
+    path = str(tmp_path / 'book.sqlite3')
+    first = PositionBook(path, 'a')
+    first.store(0x1, 'UP', 5.0, 3)
+    first.close()
+    second = PositionBook(path, 'b')
+    assert second.lookup(0x1) is None
+    second.close()
+
+
+def test_eviction_keeps_recently_used(tmp_path, clock):
+    positions = PositionBook(str(tmp_path / 'book.sqlite3'), max_entries=50)
+    writes = book.CAPACITY_CHECK_INTERVAL
+    for board in range(1, writes):
+        positions.store(board, 'UP', 0.0, 3)
+    assert len(positions) == writes - 1
+    # 命中的记录变为最近使用，淘汰时保留
+    assert positions.lookup(1) is not None
+    positions.store(writes, 'UP', 0.0, 3)
+    assert len(positions) == int(50 * 0.9)
+    assert positions.lookup(1) is not None
+    assert positions.lookup(writes) is not None
+    assert positions.lookup(2) is None
+    positions.close()
+
+
+def test_symmetric_positions_share_record(tmp_path):
+    positions = PositionBook(str(tmp_path / 'book.sqlite3'), symmetries=bitboard.ALL_SYMMETRIES)
+    board = bitboard.from_grid([[2, 4, 0, 0], [8, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]])
+    positions.store(board, 'LEFT', 3.0, 3)
+    # 左右翻转后的局面命中同一条记录，方向也随之翻转
+    assert positions.lookup(bitboard.flip_rows(board)) == (3.0, 'RIGHT', 3)
+    assert positions.lookup(bitboard.transpose(board)) == (3.0, 'UP', 3)
+    assert len(positions) == 1
+    positions.close()
+
+
+def test_closed_book_is_ignored(tmp_path):
+    positions = PositionBook(str(tmp_path / 'book.sqlite3'))
+    positions.store(0x1, 'UP', 5.0, 3)
+    positions.close()
+    positions.close()
+    assert positions.lookup(0x1) is None
+    positions.store(0x2, 'UP', 5.0, 3)
+
+
+def test_open_book_without_sqlite(tmp_path, monkeypatch):
+    monkeypatch.setattr(book, 'sqlite3', None)
+    assert open_book(Expectimax(), str(tmp_path / 'book.sqlite3')) is None
+    with pytest.raises(ImportError):
+        PositionBook(str(tmp_path / 'book.sqlite3'))
+
+
+def test_search_with_book(tmp_path):
+    engine = Expectimax(depth=2)
+    positions = open_book(engine, str(tmp_path / 'book.sqlite3'))
+    board = bitboard.from_grid([[2, 2, 0, 0], [0, 4, 0, 0], [0, 0, 0, 0], [0, 0, 0, 2]])
+    score, move, depth, from_book = search_with_book(engine, board, 1000, positions)
+    assert not from_book
+    assert depth >= engine.depth
+    assert search_with_book(engine, board, 1000, positions) == (score, move, depth, True)
+    # 没有局面库时每次都搜索
+    assert search_with_book(engine, board, 1000)[3] is False
+    positions.close()
+
+
+def test_search_with_book_skips_partial_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(search, 'TIME_CHECK_INTERVAL', 1)
+    engine = Expectimax(depth=3, cache_mb=0, prob_cutoff=0)
+    positions = open_book(engine, str(tmp_path / 'book.sqlite3'))
+    board = bitboard.from_grid([[2, 4, 8, 16], [0, 2, 0, 4], [0, 0, 0, 2], [0, 0, 0, 0]])
+    stats = SearchStats()
+    _, _, depth, _ = search_with_book(
+        engine, board, 60000, positions, stats,
+        should_stop=lambda: engine._root_depth == 3 and engine._root_partial is not None)
+    assert stats.partial and depth == 3
+    assert len(positions) == 0
+    positions.close()
@@ -0,0 +1,65 @@
+"""置换表的容量上限、淘汰策略和命中统计"""
+
+import pytest
+
+from engine2048 import Expectimax, TranspositionTable
+from engine2048.cache import ENTRY_BYTES
+
+
+def small_table(entries, policy='lru'):
+    return TranspositionTable(entries * ENTRY_BYTES / (1024 * 1024), policy)
+
+
+def test_lru_evicts_least_recently_used():
+    table = small_table(3)
+    for board in (1, 2, 3):
+        table.put(board, 2, True, (board, None))
+    assert table.get(1, 2, True) == (1, None)
+    table.put(4, 2, True, (4, None))
+    assert table.size == 3
+    assert table.get(2, 2, True) is None
+    assert table.get(1, 2, True) == (1, None)
+    assert table.stats()['evictions'] == 1
+
+
+def test_depth_policy_evicts_shallowest_first():
+    table = small_table(3, 'depth')
+    table.put(1, 5, True, (1, None))
+    table.put(2, 1, True, (2, None))
+    table.put(3, 3, True, (3, None))
+    table.put(4, 4, True, (4, None))
+    assert not table.contains(2, 1, True)
+    assert all(table.contains(board, depth, True) for board, depth in ((1, 5), (3, 3), (4, 4)))
+
+
+def test_key_separates_depth_and_node_type():
+    table = small_table(10)
+    table.put(7, 2, True, (1, 'UP'))
+    assert table.get(7, 2, False) is None
+    assert table.get(7, 3, True) is None
+    assert table.get(7, 2, True) == (1, 'UP')
+
+
+def test_stats_count_hits_and_misses():
+    table = small_table(10)
+    table.get(1, 1, True)
+    table.put(1, 1, True, (0, None))
+    table.get(1, 1, True)
+    stats = table.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert stats['hit_rate'] == 0.5
+    assert stats['max_entries'] == 10
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        TranspositionTable(1, 'fifo')
+
+
+def test_repeated_search_hits_cache_with_same_result():
+    engine = Expectimax(depth=3, prob_cutoff=0)
+    board = 0x0000000000120031
+    first = engine.search(board)
+    hits = engine.cache.hits
+    assert engine.search(board) == first
+    assert engine.cache.hits > hits
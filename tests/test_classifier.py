@@ -0,0 +1,105 @@
+"""按格子背景色识别方块"""
+
+import os
+
+import pytest
+
+from screens import PALETTE, SHARED_COLOR, np, render
+from vision2048 import TileClassifier
+
+SCREENSHOT = os.path.join(os.path.dirname(__file__), os.pardir, 'screenshot.png')
+
+# screenshot.png 中游戏区域的位置 (左, 上, 右, 下)
+SCREENSHOT_REGION = (325, 308, 837, 820)
+
+BOARD = [[0, 2, 4, 8], [16, 32, 64, 128], [256, 512, 1024, 2048], [2, 0, 4, 0]]
+
+# 调色板以外的颜色
+UNKNOWN_COLOR = (60, 120, 200)
+
+
+def make_classifier():
+    return TileClassifier(PALETTE, shared_colors=[SHARED_COLOR])
+
+
+class CountingFallback:
+    """代替OCR的回退函数：按调用顺序返回给定的数值"""
+
+    def __init__(self, *values):
+        self.values = list(values)
+        self.calls = 0
+
+    def __call__(self, cell):
+        self.calls += 1
+        return self.values.pop(0) if self.values else 0
+
+
+def test_screenshot():
+    Image = pytest.importorskip('PIL.Image')
+    image = np.asarray(Image.open(SCREENSHOT).convert('RGB').crop(SCREENSHOT_REGION))
+    board, fallbacks = make_classifier().recognize(image)
+    assert board == [[0, 0, 0, 0], [0, 0, 0, 0], [0, 2, 0, 0], [0, 2, 0, 0]]
+    assert fallbacks == 0
+
+
+def test_palette_colors():
+    board, fallbacks = make_classifier().recognize(render(BOARD))
+    assert board == BOARD
+    assert fallbacks == 0
+
+
+def test_unknown_color_uses_fallback_and_is_learned():
+    classifier = make_classifier()
+    image = render([[4096, 0, 0, 0]] + [[0] * 4] * 3, colors={4096: UNKNOWN_COLOR})
+    fallback = CountingFallback(4096, 4096)
+    for _ in range(2):
+        board, fallbacks = classifier.recognize(image, fallback)
+        assert board[0][0] == 4096 and fallbacks == 1
+    # 两次得到相同数值后按颜色识别，不再调用回退函数
+    board, fallbacks = classifier.recognize(image, fallback)
+    assert board[0][0] == 4096 and fallbacks == 0
+    assert fallback.calls == 2
+
+
+def test_inconsistent_fallback_is_not_learned():
+    classifier = make_classifier()
+    image = render([[4096, 0, 0, 0]] + [[0] * 4] * 3, colors={4096: UNKNOWN_COLOR})
+    fallback = CountingFallback(4096, 8192, 4096, 4096)
+    for _ in range(4):
+        assert classifier.recognize(image, fallback)[1] == 1
+    assert fallback.calls == 4
+
+
+def test_shared_color_always_uses_fallback():
+    classifier = make_classifier()
+    image = render([[4096, 8192, 0, 0]] + [[0] * 4] * 3)
+    fallback = CountingFallback(4096, 8192, 4096, 8192, 4096, 8192)
+    for _ in range(3):
+        board, fallbacks = classifier.recognize(image, fallback)
+        assert board[0][:2] == [4096, 8192]
+        assert fallbacks == 2
+
+
+def test_color_near_other_value_is_not_learned():
+    classifier = make_classifier()
+    # 与4的参考颜色相距不足两倍 max_distance
+    near_four = tuple(c + 8 for c in (237, 224, 200))
+    image = render([[4096, 0, 0, 0]] + [[0] * 4] * 3, colors={4096: near_four})
+    fallback = CountingFallback(4096, 4096, 4096)
+    for _ in range(3):
+        assert classifier.recognize(image, fallback)[1] == 1
+
+
+def test_without_fallback_unknown_cells_are_empty():
+    image = render([[4096, 2, 0, 0]] + [[0] * 4] * 3, colors={4096: UNKNOWN_COLOR})
+    board, fallbacks = make_classifier().recognize(image)
+    assert board[0][:2] == [0, 2]
+    assert fallbacks == 0
+
+
+def test_recognize_cells_only_reads_given_cells():
+    fallback = CountingFallback(4096)
+    image = render([[4096, 2, 0, 0]] + [[0] * 4] * 3, colors={4096: UNKNOWN_COLOR})
+    values, fallback_cells = make_classifier().recognize_cells(image, [1, 0, 15], fallback)
+    assert values == [2, 4096, 0]
+    assert fallback_cells == [0]
@@ -0,0 +1,39 @@
+"""
+位棋盘引擎与列表实现的一致性检查
+
+在固定种子的随机局面上，把位棋盘的移动和 Expectimax 的搜索结果与 reference.py 中的
+列表版实现比较。位运算和查找表的改动都应保持这些结果不变。
+"""
+
+import pytest
+
+from engine2048 import Expectimax, bitboard
+from reference import BASES, assert_same, cases, reference_moves
+
+
+def test_moves_match_list_implementation():
+    for base, grid in cases(1):
+        board = bitboard.from_grid(grid, base)
+        for direction in bitboard.DIRECTIONS:
+            assert (bitboard.to_grid(bitboard.move(board, direction), base)
+                    == bitboard._move_grid_slow(grid, direction))
+
+
+def test_move_grid_keeps_unrepresentable_values():
+    grid = [[3, 3, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]]
+    assert bitboard.move_grid(grid, 'LEFT') == [[6, 0, 0, 0], [0] * 4, [0] * 4, [0] * 4]
+
+
+@pytest.mark.parametrize('depth', (1, 2, 3))
+def test_search_matches_reference(depth):
+    engines = {base: Expectimax(depth, base, prob_cutoff=0) for base in BASES}
+    for base, grid in cases(3 + depth):
+        # 同一个搜索对象连续搜索，置换表中留有前面局面的结果
+        result = engines[base].search(bitboard.from_grid(grid, base))
+        assert_same(result, grid, depth, base)
+
+
+def test_valid_moves_match_list_implementation():
+    for base, grid in cases(1):
+        expected = [direction for direction, _ in reference_moves(grid)]
+        assert bitboard.valid_moves(bitboard.from_grid(grid, base)) == expected, grid
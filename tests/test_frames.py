@@ -0,0 +1,98 @@
+"""逐帧变化检测与画面稳定等待"""
+
+from screens import PALETTE, SHARED_COLOR, render
+from vision2048 import FrameTracker, TileClassifier, wait_until_settled
+
+BOARD = [[2, 4, 0, 0], [0, 8, 0, 0], [0, 0, 16, 0], [0, 0, 0, 2]]
+
+
+def make_tracker():
+    return FrameTracker(TileClassifier(PALETTE, shared_colors=[SHARED_COLOR]))
+
+
+def with_cell(board, i, j, value):
+    board = [list(row) for row in board]
+    board[i][j] = value
+    return board
+
+
+def test_only_changed_cells_are_recognized():
+    tracker = make_tracker()
+    board, changed = tracker.update(render(BOARD))
+    assert board == BOARD
+    assert changed == list(range(16))
+
+    assert tracker.update(render(BOARD)) == (BOARD, [])
+
+    moved = with_cell(with_cell(BOARD, 0, 1, 0), 0, 3, 4)
+    assert tracker.update(render(moved)) == (moved, [1, 3])
+
+
+def test_unresolved_cells_are_retried():
+    tracker = make_tracker()
+    image = render(with_cell(BOARD, 3, 0, 4096))
+    results = iter([0, 4096])
+    calls = []
+
+    def fallback(cell):
+        calls.append(cell)
+        return next(results)
+
+    board, _ = tracker.update(image, fallback)
+    assert board[3][0] == 0 and tracker.fallbacks == 1
+    # 回退函数没有识出数值，像素不变也要再识别一次
+    board, changed = tracker.update(image, fallback)
+    assert changed == [12]
+    assert board[3][0] == 4096
+    assert tracker.update(image, fallback) == (board, [])
+    assert len(calls) == 2
+
+
+def test_reset_recognizes_everything_again():
+    tracker = make_tracker()
+    tracker.update(render(BOARD))
+    tracker.reset()
+    assert tracker.update(render(BOARD))[1] == list(range(16))
+
+
+def test_size_change_recognizes_everything_again():
+    tracker = make_tracker()
+    tracker.update(render(BOARD))
+    assert tracker.update(render(BOARD, cell=80)) == (BOARD, list(range(16)))
+
+
+class Screen:
+    """按顺序返回给定的画面，用完后一直返回最后一帧"""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.grabs = 0
+
+    def __call__(self):
+        self.grabs += 1
+        return self.frames.pop(0) if len(self.frames) > 1 else self.frames[0]
+
+
+def test_wait_until_settled_waits_for_animation():
+    before = render(BOARD)
+    middle = render(with_cell(BOARD, 0, 2, 2))
+    after = render(with_cell(BOARD, 0, 3, 2))
+    screen = Screen([before, before, middle, after, after, after])
+    frame, settled = wait_until_settled(screen, reference=before, timeout=2.0, interval=0)
+    assert settled
+    assert (frame == after).all()
+
+
+def test_wait_until_settled_without_reference():
+    screen = Screen([render(BOARD)])
+    _, settled = wait_until_settled(screen, timeout=2.0, interval=0)
+    assert settled
+    assert screen.grabs == 3
+
+
+def test_wait_until_settled_times_out_when_nothing_moves():
+    before = render(BOARD)
+    frame, settled = wait_until_settled(Screen([before]), reference=before,
+                                        timeout=0.05, interval=0.005)
+    assert not settled
+    assert (frame == before).all()
@@ -0,0 +1,66 @@
+"""感知哈希与字形缓存"""
+
+from itertools import combinations
+
+from screens import PALETTE, render
+from vision2048 import GlyphCache, cell_images, glyph_hash
+from vision2048.glyphs import hamming
+
+# GlyphCache 默认的最大汉明距离
+MAX_DISTANCE = 12
+
+
+def cell(value, size=100, color=None):
+    """单个方块去掉边距后的图像"""
+    colors = {value: color} if color else None
+    return cell_images(render([[value, 0, 0, 0]] + [[0] * 4] * 3, colors, cell=size))[0]
+
+
+def test_blank_cell_has_no_hash():
+    assert glyph_hash(cell(0)) == 0
+
+
+def test_hash_ignores_size_and_background():
+    key = glyph_hash(cell(64))
+    assert key != 0
+    # 放大一倍后笔画边缘的取样略有不同，只差少数几位
+    assert hamming(glyph_hash(cell(64, size=200)), key) <= MAX_DISTANCE
+    assert glyph_hash(cell(64, color=PALETTE[32])) == key
+
+
+def test_hash_ignores_ink_polarity():
+    # 深底浅字与浅底深字的笔画相同
+    image = cell(64)
+    assert glyph_hash(255 - image) == glyph_hash(image)
+
+
+def test_hash_separates_values():
+    keys = [glyph_hash(cell(2 ** k)) for k in range(1, 12)]
+    assert min(hamming(a, b) for a, b in combinations(keys, 2)) > MAX_DISTANCE
+
+
+def test_cache_lookup_and_persistence(tmp_path):
+    path = str(tmp_path / 'glyphs.json')
+    cache = GlyphCache(path)
+    key = glyph_hash(cell(32))
+    assert cache.lookup(key) is None
+    cache.add(key, 32)
+    cache.add(glyph_hash(cell(8)), 3)
+    assert len(cache) == 1
+
+    reloaded = GlyphCache(path)
+    assert reloaded.lookup(key) == 32
+    # 只差几位的哈希取最近的记录
+    assert reloaded.lookup(key ^ 0b101) == 32
+    assert reloaded.lookup(key ^ ((1 << 40) - 1)) is None
+    assert (reloaded.hits, reloaded.misses) == (2, 1)
+
+
+def test_corrupt_cache_starts_empty(tmp_path):
+    path = tmp_path / 'glyphs.json'
+    path.write_text('{not json', encoding='utf-8')
+    assert len(GlyphCache(str(path))) == 0
+    path.write_text('{"ff": 3, "fe": 8}', encoding='utf-8')
+    cache = GlyphCache(str(path))
+    assert len(cache) == 1
+    assert cache.lookup(0xfe) == 8
@@ -0,0 +1,37 @@
+"""逐行查找表评估与逐格评估一致"""
+
+import pytest
+
+from engine2048 import HeuristicTables, bitboard, evaluate_board
+from reference import cases, reference_evaluate
+
+WEIGHTS = (
+    None,
+    {'corner': 0},
+    {'empty': 500, 'smoothness': 0, 'max_tile': 3},
+)
+
+
+def test_reference_is_evaluate_board():
+    for _, grid in cases(2):
+        assert reference_evaluate(grid) == evaluate_board(grid)
+
+
+@pytest.mark.parametrize('weights', WEIGHTS)
+def test_tables_match_evaluate_board(weights):
+    tables = {}
+    for base, grid in cases(2):
+        table = tables.setdefault(base, HeuristicTables(base, weights))
+        assert table.evaluate(bitboard.from_grid(grid, base)) == reference_evaluate(grid, weights)
+
+
+def test_set_weights_rebuilds_tables():
+    tables = HeuristicTables()
+    board = bitboard.from_grid([[4, 2, 0, 0], [2, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 2]])
+    tables.set_weights(corner=0)
+    assert tables.evaluate(board) == reference_evaluate(bitboard.to_grid(board), {'corner': 0})
+
+
+def test_unknown_weight_rejected():
+    with pytest.raises(ValueError):
+        HeuristicTables(weights={'corners': 1})
@@ -0,0 +1,59 @@
+"""
+增量评估：只重查放入新方块的那一行和那一列，结果与完整评估相同
+"""
+
+import pytest
+
+from engine2048 import Expectimax, bitboard
+from engine2048.heuristics import HeuristicTables
+from reference import BASES, cases
+
+
+def test_evaluate_spawn_matches_full_evaluation():
+    tables = {base: HeuristicTables(base) for base in BASES}
+    for base, grid in cases(30, per_base=6):
+        heuristic = tables[base]
+        board = bitboard.from_grid(grid, base)
+        partial = heuristic.partial(board)
+        for shift in bitboard.empty_shifts(board):
+            for rank in (1, 2):
+                child = board | (rank << shift)
+                assert (heuristic.evaluate_spawn(board, partial, shift, rank)
+                        == pytest.approx(heuristic.evaluate(child)))
+
+
+@pytest.mark.parametrize('afterstate', (False, True))
+@pytest.mark.parametrize('depth', (1, 2, 3))
+def test_incremental_search_matches_full(depth, afterstate):
+    for base, grid in cases(31 + depth, per_base=8):
+        board = bitboard.from_grid(grid, base)
+        full = Expectimax(depth, base, cache_mb=0, incremental=False, afterstate=afterstate)
+        fast = Expectimax(depth, base, cache_mb=0, incremental=True, afterstate=afterstate)
+        expected = full.search(board)
+        result = fast.search(board)
+        assert result[0] == pytest.approx(expected[0], rel=1e-9), grid
+        assert result[1] == expected[1], grid
+
+
+def test_timeout_does_not_leave_spawn_behind():
+    grid = [[2, 4, 8, 16], [0, 2, 0, 4], [0, 0, 0, 2], [0, 0, 0, 0]]
+    board = bitboard.from_grid(grid)
+    engine = Expectimax(depth=3, cache_mb=0)
+    stopped_at = []
+
+    def stop():
+        # 在机会节点展开子局面的中途中止，并记下这个子局面
+        if engine._spawn is None:
+            return False
+        stopped_at.append(engine._spawn)
+        return True
+
+    engine.search_timed(board, 10000, should_stop=stop)
+    assert stopped_at
+    assert engine._spawn is None
+
+    # 换了权重后，中止时的那个子局面要按新权重完整评估
+    parent, _, shift, rank = stopped_at[0]
+    child = parent | (rank << shift)
+    engine.set_weights(corner=0)
+    assert engine.evaluate(child) == pytest.approx(HeuristicTables(2, {'corner': 0}).evaluate(child))
@@ -0,0 +1,22 @@
+"""多进程并行搜索与串行搜索结果一致（不启用概率剪枝时）"""
+
+import pytest
+
+from engine2048 import Expectimax, ParallelExpectimax, bitboard
+from reference import BASES, cases
+
+
+@pytest.fixture(scope='module', params=BASES)
+def engines(request):
+    parallel = ParallelExpectimax(2, depth=2, base=request.param, prob_cutoff=0)
+    yield request.param, parallel, Expectimax(depth=2, base=request.param, prob_cutoff=0)
+    parallel.close()
+
+
+def test_parallel_matches_serial(engines):
+    base, parallel, serial = engines
+    for case_base, grid in cases(20, per_base=6):
+        if case_base != base:
+            continue
+        board = bitboard.from_grid(grid, base)
+        assert parallel.search(board) == serial.search(board), grid
@@ -0,0 +1,55 @@
+"""
+迭代加深搜索：完整迭代、超时时的部分迭代
+"""
+
+import pytest
+
+from engine2048 import Expectimax, bitboard, search
+from engine2048.stats import SearchStats
+
+BOARD = bitboard.from_grid([[2, 4, 8, 16], [0, 2, 0, 4], [0, 0, 0, 2], [0, 0, 0, 0]])
+
+
+@pytest.fixture
+def check_every_node(monkeypatch):
+    # 每个节点都检查是否中止，中止的位置不受节点数影响
+    monkeypatch.setattr(search, 'TIME_CHECK_INTERVAL', 1)
+
+
+def stop_during(engine, depth):
+    """在第depth层迭代已搜完至少一个根节点方向后中止"""
+    return lambda: engine._root_depth == depth and engine._root_partial is not None
+
+
+def test_completed_iterations_report_their_depth():
+    engine = Expectimax(prob_cutoff=0, max_depth=3)
+    iterations = []
+    stats = SearchStats()
+    score, move, depth = engine.search_timed(
+        BOARD, 60000, on_iteration=lambda *result: iterations.append(result), stats=stats)
+    assert [d for _, _, d in iterations] == [1, 2, 3]
+    assert (score, move, depth) == iterations[-1]
+    assert stats.depth == 3 and not stats.partial
+
+
+@pytest.mark.parametrize('afterstate', (False, True))
+def test_partial_iteration_reports_its_depth(afterstate, check_every_node):
+    engine = Expectimax(cache_mb=0, prob_cutoff=0, afterstate=afterstate)
+    stats = SearchStats()
+    score, move, depth = engine.search_timed(BOARD, 60000, should_stop=stop_during(engine, 3),
+                                             stats=stats)
+    assert depth == 3
+    assert stats.partial and stats.depth == 3
+    # 得分是该方向在第3层的完整得分
+    expected, _ = Expectimax(cache_mb=0, prob_cutoff=0).expectimax(
+        bitboard.move(BOARD, move), 2, False)
+    assert score == pytest.approx(expected)
+
+
+def test_timeout_before_any_move_keeps_previous_iteration(check_every_node):
+    engine = Expectimax(cache_mb=0, prob_cutoff=0)
+    stats = SearchStats()
+    _, _, depth = engine.search_timed(
+        BOARD, 60000, should_stop=lambda: engine._root_depth == 3, stats=stats)
+    assert depth == 2
+    assert not stats.partial and stats.depth == 2
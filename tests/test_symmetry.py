@@ -0,0 +1,66 @@
+"""
+对称变换与置换表的对称合并
+"""
+
+import pytest
+
+from engine2048 import Expectimax, bitboard
+from engine2048.heuristics import HeuristicTables
+from reference import BASES, assert_same, cases
+
+# 评估函数对部分或全部对称变换不变的权重
+SYMMETRIC_WEIGHTS = ({'corner': 0}, {'corner': 0, 'monotonicity': 0})
+
+
+def test_moves_follow_symmetry():
+    for base, grid in cases(5, per_base=4):
+        board = bitboard.from_grid(grid, base)
+        for sym in bitboard.ALL_SYMMETRIES:
+            image = bitboard.apply_symmetry(board, sym)
+            for direction in bitboard.DIRECTIONS:
+                mapped = bitboard.SYMMETRY_MOVES[sym][direction]
+                assert (bitboard.move(image, mapped)
+                        == bitboard.apply_symmetry(bitboard.move(board, direction), sym))
+                assert bitboard.SYMMETRY_INVERSE_MOVES[sym][mapped] == direction
+
+
+def test_canonical_is_shared_by_symmetric_boards():
+    for base, grid in cases(6, per_base=4):
+        board = bitboard.from_grid(grid, base)
+        key, sym = bitboard.canonical(board)
+        assert bitboard.apply_symmetry(board, sym) == key
+        for other in bitboard.ALL_SYMMETRIES:
+            assert bitboard.canonical(bitboard.apply_symmetry(board, other))[0] == key
+
+
+@pytest.mark.parametrize('weights', ({},) + SYMMETRIC_WEIGHTS)
+def test_evaluation_invariant_under_reported_symmetries(weights):
+    tables = {base: HeuristicTables(base, weights) for base in BASES}
+    for base, grid in cases(7, per_base=6):
+        heuristic = tables[base]
+        board = bitboard.from_grid(grid, base)
+        for sym in heuristic.symmetries():
+            assert (heuristic.evaluate(bitboard.apply_symmetry(board, sym))
+                    == pytest.approx(heuristic.evaluate(board)))
+
+
+def test_default_weights_do_not_merge():
+    assert Expectimax().symmetries is None
+    assert Expectimax(weights={'corner': 0}).symmetries == (0, 1)
+    assert Expectimax(weights={'corner': 0}, symmetry=False).symmetries is None
+    engine = Expectimax()
+    engine.set_weights(corner=0, monotonicity=0)
+    assert engine.symmetries == bitboard.ALL_SYMMETRIES
+
+
+@pytest.mark.parametrize('weights', SYMMETRIC_WEIGHTS)
+@pytest.mark.parametrize('depth', (1, 2, 3))
+def test_symmetric_search_matches_reference(weights, depth):
+    engines = {base: Expectimax(depth, base, prob_cutoff=0, weights=weights) for base in BASES}
+    for base, grid in cases(10 + depth, per_base=8):
+        board = bitboard.from_grid(grid, base)
+        assert_same(engines[base].search(board), grid, depth, base, weights)
+        # 对称的局面命中同一批置换表记录，结果仍与参照一致
+        image = bitboard.apply_symmetry(board, engines[base].symmetries[-1])
+        assert_same(engines[base].search(image), bitboard.to_grid(image, base),
+                    depth, base, weights)
@@ -0,0 +1,62 @@
+"""后台搜索线程的取消与出错处理"""
+
+import queue
+
+from engine2048 import Expectimax, SearchWorker, bitboard
+
+BOARD = bitboard.from_grid([[2, 4, 8, 16], [0, 2, 0, 4], [0, 0, 2, 0], [0, 0, 0, 2]])
+
+TIMEOUT = 10
+
+
+def finals(results, count=1):
+    """取出 count 个最终结果，同时返回途中收到的全部结果"""
+    received = []
+    while sum(result.final for result in received) < count:
+        received.append(results.get(timeout=TIMEOUT))
+    return received
+
+
+def test_new_job_cancels_previous():
+    worker = SearchWorker(Expectimax(depth=3, max_depth=7), budget_ms=300)
+    results = queue.Queue()
+    try:
+        first = worker.submit(BOARD, results.put)
+        second = worker.submit(BOARD, results.put)
+        received = finals(results)
+        assert received[-1].job == second
+        assert received[-1].move in bitboard.valid_moves(BOARD)
+        assert received[-1].stats is not None
+        assert all(result.job != first or not result.final for result in received)
+    finally:
+        worker.stop()
+
+
+def test_cancel_drops_result():
+    worker = SearchWorker(Expectimax(depth=3, max_depth=7), budget_ms=300)
+    results = queue.Queue()
+    try:
+        worker.submit(BOARD, results.put)
+        worker.cancel()
+        job = worker.submit(BOARD, results.put)
+        assert all(result.job == job for result in finals(results) if result.final)
+    finally:
+        worker.stop()
+
+
+class FailingEngine:
+    afterstate = False
+
+    def search_timed(self, board, budget_ms, **kwargs):
+        raise RuntimeError("boom")
+
+
+def test_error_is_reported_as_final_result():
+    worker = SearchWorker(FailingEngine())
+    results = queue.Queue()
+    try:
+        job = worker.submit(BOARD, results.put, afterstate=True)
+        result = results.get(timeout=TIMEOUT)
+        assert (result.job, result.final, result.move, result.error) == (job, True, None, "boom")
+    finally:
+        worker.stop()
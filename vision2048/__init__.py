@@ -0,0 +1,11 @@
+"""
+2048 棋盘识别（无界面）
+
+从游戏区域截图中识别4x4棋盘。本包只依赖 numpy，不导入界面库和OCR库；
+OCR 由调用方作为回退函数传入。
+"""
+
+from .autoplay import AutoPlayer
+from .classifier import TileClassifier, binarize, cell_images, cell_samples, hex_to_rgb
+from .frames import FrameTracker, wait_until_settled
+from .glyphs import GlyphCache, glyph_hash
@@ -0,0 +1,172 @@
+"""
+流水线自动游戏
+
+截图、识别、搜索加按键三个阶段各在一个线程中运行，阶段之间用容量为1的队列传递结果：
+截图线程等到画面稳定（见 frames.wait_until_settled）立即把这一帧交给识别线程，
+识别出的棋盘交给搜索线程选择方向并按键，按键后截图线程马上开始等待下一次稳定，
+不再固定等待。界面线程不参与其中，自动游戏时界面保持响应。
+
+max_rate 限制每秒最多执行的移动次数；每个阶段最近若干次的耗时见 latency()。
+本模块不依赖界面库，截图、识别、选择方向和按键都由调用方传入，
+回调在工作线程中调用，界面代码需要自行切回界面线程。
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+
+from .frames import wait_until_settled
+
+STAGES = ('capture', 'recognize', 'search', 'press')
+
+# 每个阶段保留最近这么多次耗时用于计算平均值
+LATENCY_WINDOW = 50
+
+
+class AutoPlayer:
+    """三阶段流水线自动游戏
+
+    grab() 返回一帧截图；recognize(帧) 返回4x4棋盘；choose_move(棋盘) 返回方向，
+    返回None时结束自动游戏；press(方向) 发送按键。
+    on_move(棋盘, 方向, 画面是否稳定) 在每次按键后调用，on_stop(异常或None) 在结束时调用。
+    """
+
+    def __init__(self, grab, recognize, choose_move, press, max_rate=4.0,
+                 settle_timeout=1.0, poll_interval=0.02, on_move=None, on_stop=None):
+        self.grab = grab
+        self.recognize = recognize
+        self.choose_move = choose_move
+        self.press = press
+        self.max_rate = max_rate
+        self.settle_timeout = settle_timeout
+        self.poll_interval = poll_interval
+        self.on_move = on_move
+        self.on_stop = on_stop
+        self.moves = 0
+        self._latency = {stage: deque(maxlen=LATENCY_WINDOW) for stage in STAGES}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    @property
+    def running(self):
+        return self.is_alive() and not self._stop.is_set()
+
+    def is_alive(self):
+        """是否还有线程未退出（stop 之后各线程完成当前阶段才退出）"""
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        """启动三个阶段的线程"""
+        if self.running:
+            return
+        # 等待上一轮的线程退出，避免它们读到新一轮的队列
+        self.join()
+        self._stop.clear()
+        self.moves = 0
+        # 上一次按键前的一帧，截图线程等画面相对它发生变化
+        self._reference = None
+        self._last_press = 0.0
+        self._frames = queue.Queue(maxsize=1)
+        self._boards = queue.Queue(maxsize=1)
+        self._pressed = queue.Queue(maxsize=1)
+        self._threads = [
+            threading.Thread(target=self._run, args=(self._capture,), name='autoplay-capture', daemon=True),
+            threading.Thread(target=self._run, args=(self._recognize,), name='autoplay-recognize', daemon=True),
+            threading.Thread(target=self._run, args=(self._search,), name='autoplay-search', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """请求停止（各线程完成当前阶段后退出）"""
+        self._finish(None)
+
+    def join(self, timeout=None):
+        """等待各线程退出（先调用 stop）"""
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def latency(self):
+        """各阶段最近的平均耗时（毫秒）"""
+        with self._lock:
+            return {stage: sum(times) / len(times) * 1000 if times else 0.0
+                    for stage, times in self._latency.items()}
+
+    def _record(self, stage, start):
+        with self._lock:
+            self._latency[stage].append(time.perf_counter() - start)
+
+    def _finish(self, error):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self.on_stop is not None:
+            self.on_stop(error)
+
+    def _get(self, q):
+        # 阻塞等待上一阶段的结果，停止时返回None
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
+    def _run(self, stage):
+        try:
+            while not self._stop.is_set():
+                stage()
+        except Exception as e:
+            self._finish(e)
+
+    def _capture(self):
+        # 第一帧只等画面稳定，之后等画面相对按键前的一帧发生变化再稳定
+        start = time.perf_counter()
+        frame, settled = wait_until_settled(self.grab, self._reference, self.settle_timeout,
+                                            self.poll_interval)
+        self._record('capture', start)
+        self._frames.put((frame, settled))
+        self._reference = self._get(self._pressed)
+
+    def _recognize(self):
+        item = self._get(self._frames)
+        if item is None:
+            return
+        frame, settled = item
+        start = time.perf_counter()
+        board = self.recognize(frame)
+        self._record('recognize', start)
+        self._boards.put((frame, board, settled))
+
+    def _search(self):
+        item = self._get(self._boards)
+        if item is None:
+            return
+        frame, board, settled = item
+        start = time.perf_counter()
+        move = self.choose_move(board)
+        self._record('search', start)
+        if self._stop.is_set():
+            return
+        if move is None:
+            self._finish(None)
+            return
+
+        # 限制移动频率
+        if self.max_rate:
+            wait = self._last_press + 1.0 / self.max_rate - time.perf_counter()
+            if wait > 0:
+                self._stop.wait(wait)
+        # 停止后不再按键
+        if self._stop.is_set():
+            return
+        start = time.perf_counter()
+        self.press(move)
+        self._last_press = time.perf_counter()
+        self._record('press', start)
+        self.moves += 1
+        if self.on_move is not None:
+            self.on_move(board, move, settled)
+        self._pressed.put(frame)
@@ -0,0 +1,202 @@
+"""
+颜色特征方块分类
+
+2048中每个格子的背景色几乎只由方块数值决定。取格子内部采样像素各通道的中位数
+作为颜色特征（数字笔画只占少数像素，不影响中位数），与各数值的参考颜色比较，
+取距离最近且足够近的一个。参考颜色由界面调色板（get_color_by_value）给出；
+找不到足够近的颜色时交给调用方传入的回退函数（通常是OCR）。回退函数两次把相近的
+颜色识别为同一数值后，这个颜色才加入参考颜色，之后同样的方块直接按颜色识别；
+多个数值共用的颜色（例如调色板以外的数值共用的默认色）、离其他数值的参考颜色
+太近或两次识别结果不一致的颜色不会学习，这样的格子每次都交给回退函数。
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 格子四边留出的边距（像素），避开格子之间的缝隙
+CELL_MARGIN = 10
+
+# 每隔几个像素取一个样本
+SAMPLE_STEP = 2
+
+# PIL 'L' 模式的灰度系数
+LUMA = (0.299, 0.587, 0.114)
+
+# OCR前二值化的灰度阈值
+BINARY_THRESHOLD = 128
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("棋盘识别需要 numpy，请先安装: pip install numpy")
+
+
+def hex_to_rgb(color):
+    """'#RRGGBB' -> (r, g, b)"""
+    color = color.lstrip('#')
+    return tuple(int(color[k:k + 2], 16) for k in (0, 2, 4))
+
+
+def _to_rgb(color):
+    return hex_to_rgb(color) if isinstance(color, str) else tuple(color)
+
+
+def is_tile_value(value):
+    """是否是合法的方块数值（1或2的正整数次幂）"""
+    return isinstance(value, int) and value > 0 and value & (value - 1) == 0
+
+
+def grayscale(image):
+    """H x W x 3 图像 -> H x W 灰度数组（已是灰度时原样返回）"""
+    require_numpy()
+    pixels = np.asarray(image)
+    return pixels[..., :3] @ np.array(LUMA) if pixels.ndim == 3 else pixels
+
+
+def binarize(image, threshold=BINARY_THRESHOLD):
+    """按灰度阈值二值化，返回 0/255 的 uint8 数组，可直接传给OCR
+
+    与 PIL 转 'L' 模式后逐像素比较的结果完全相同：灰度按 PIL 的16位定点系数计算，
+    并把阈值换算到同一尺度，整个数组一次比较，不逐像素调用Python函数。
+    """
+    require_numpy()
+    pixels = np.asarray(image)
+    if pixels.ndim == 2:
+        return np.where(pixels < threshold, 0, 255).astype(np.uint8)
+    # 先转成uint32：NumPy 1.x 中 uint8 数组乘标量的结果类型由数值决定，可能溢出
+    pixels = pixels[..., :3].astype(np.uint32)
+    gray = pixels[..., 0] * 19595
+    gray += pixels[..., 1] * 38470
+    gray += pixels[..., 2] * 7471
+    return ((gray >= (threshold << 16) - 0x8000) * np.uint8(255)).astype(np.uint8)
+
+
+def _grid_cells(pixels):
+    # H x W x 3 -> 4 x 4 x 格高 x 格宽 x 3（视图，不复制）
+    h, w = pixels.shape[:2]
+    ch, cw = h // 4, w // 4
+    cells = pixels[:ch * 4, :cw * 4].reshape(4, ch, 4, cw, pixels.shape[2])
+    return cells.transpose(0, 2, 1, 3, 4)
+
+
+def _margin(pixels, margin):
+    # 格子太小时缩小边距，至少保留格子中间的一半
+    h, w = pixels.shape[:2]
+    return min(margin, h // 16, w // 16)
+
+
+def cell_samples(image, margin=CELL_MARGIN, step=SAMPLE_STEP):
+    """把截图切成16个格子，返回 16 x N x 3 的采样像素（按行优先排列）"""
+    require_numpy()
+    pixels = np.asarray(image)[..., :3]
+    m = _margin(pixels, margin)
+    cells = _grid_cells(pixels)
+    ch, cw = cells.shape[2:4]
+    return cells[:, :, m:ch - m:step, m:cw - m:step].reshape(16, -1, 3)
+
+
+def cell_images(image, margin=CELL_MARGIN):
+    """16个格子去掉边距后的图像（数组视图，按行优先排列）"""
+    require_numpy()
+    pixels = np.asarray(image)
+    m = _margin(pixels, margin)
+    cells = _grid_cells(pixels)
+    ch, cw = cells.shape[2:4]
+    return [cell for row in cells[:, :, m:ch - m, m:cw - m] for cell in row]
+
+
+def cell_features(image, margin=CELL_MARGIN, step=SAMPLE_STEP):
+    """16个格子的颜色特征（各通道中位数），返回 16 x 3 数组"""
+    return np.median(cell_samples(image, margin, step), axis=1)
+
+
+class TileClassifier:
+    """按格子背景色识别方块数值
+
+    palette 为 {数值: '#RRGGBB' 或 (r, g, b)}，max_distance 为RGB空间中
+    认定为同一数值的最大距离；shared_colors 为不只对应一个数值的颜色，
+    这些颜色附近的格子总是交给回退函数。
+    """
+
+    def __init__(self, palette, max_distance=10.0, shared_colors=()):
+        require_numpy()
+        self.max_distance = max_distance
+        self._values = []
+        self._colors = []
+        # 不学习的颜色，以及回退识别过一次、等待再次确认的 (数值, 颜色)
+        self._ambiguous = [_to_rgb(color) for color in shared_colors]
+        self._pending = []
+        for value, color in palette.items():
+            self.add(value, _to_rgb(color))
+
+    def add(self, value, color):
+        """加入一个参考颜色（同一数值可以有多个）"""
+        self._values.append(value)
+        self._colors.append(tuple(float(c) for c in color))
+        self._color_array = np.array(self._colors)
+
+    def _near(self, a, b, distance=None):
+        return np.linalg.norm(np.subtract(a, b)) <= (distance or self.max_distance)
+
+    def learn(self, value, color):
+        """记录回退函数的一次识别结果，同一颜色第二次得到相同数值时加入参考颜色"""
+        color = tuple(float(c) for c in color)
+        if any(self._near(color, c) for c in self._ambiguous):
+            return
+        # 与其他数值的参考颜色相距不足两倍 max_distance 时，两者的匹配范围会重叠
+        if any(v != value and self._near(color, c, 2 * self.max_distance)
+               for v, c in zip(self._values, self._colors)):
+            self._ambiguous.append(color)
+            return
+        for k, (pending_value, pending_color) in enumerate(self._pending):
+            if self._near(color, pending_color):
+                del self._pending[k]
+                if pending_value == value:
+                    self.add(value, color)
+                else:
+                    self._ambiguous.append(color)
+                return
+        self._pending.append((value, color))
+
+    def classify(self, features):
+        """按颜色特征分类，返回数值列表，没有足够近的参考颜色时为None"""
+        features = np.asarray(features, dtype=float).reshape(-1, 3)
+        distances = np.linalg.norm(features[:, None, :] - self._color_array[None, :, :], axis=2)
+        nearest = distances.argmin(axis=1)
+        return [self._values[k] if distances[n, k] <= self.max_distance else None
+                for n, k in enumerate(nearest)]
+
+    def recognize(self, image, fallback=None, learn=True):
+        """识别整个棋盘，返回 (4x4数值列表, 回退识别的格子数)
+
+        颜色无法判断的格子调用 fallback(格子图像) 识别，没有回退函数时记为0；
+        learn为True时用回退识别出的方块颜色学习参考颜色（见 learn）。
+        """
+        values, fallback_cells = self.recognize_cells(image, range(16), fallback, learn)
+        return [values[i * 4:i * 4 + 4] for i in range(4)], len(fallback_cells)
+
+    def recognize_cells(self, image, indexes, fallback=None, learn=True):
+        """只识别指定的格子（按行优先编号0-15），返回 (数值列表, 回退识别的格子编号列表)"""
+        indexes = list(indexes)
+        if not indexes:
+            return [], []
+        features = np.median(cell_samples(image)[indexes], axis=1)
+        values = self.classify(features)
+        fallback_cells = []
+        cells = None
+        for n, value in enumerate(values):
+            if value is not None:
+                continue
+            value = 0
+            if fallback is not None:
+                k = indexes[n]
+                fallback_cells.append(k)
+                if cells is None:
+                    cells = cell_images(image)
+                value = fallback(cells[k])
+                if learn and is_tile_value(value):
+                    self.learn(value, features[n])
+            values[n] = value
+        return values, fallback_cells
@@ -0,0 +1,110 @@
+"""
+逐帧变化检测
+
+比较相邻两帧中每个格子的采样像素（见 classifier.cell_samples），只重新识别像素
+有变化的格子；同样的比较也用来判断移动动画是否已经结束，自动模式据此在画面
+稳定后立即进行下一步，而不是固定等待。
+"""
+
+import time
+
+from .classifier import cell_samples, is_tile_value, require_numpy
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 格子采样像素的平均绝对差超过该值时认为格子有变化
+CHANGE_THRESHOLD = 4.0
+
+
+def _samples(image):
+    return cell_samples(image).astype(np.int16)
+
+
+def cell_differences(previous, current):
+    """两帧采样像素（_samples 的结果）中每个格子的平均绝对差，返回长度16的数组"""
+    return np.abs(current - previous).mean(axis=(1, 2))
+
+
+class FrameTracker:
+    """跟踪连续的棋盘画面，只重新识别变化的格子"""
+
+    def __init__(self, classifier, threshold=CHANGE_THRESHOLD):
+        require_numpy()
+        self.classifier = classifier
+        self.threshold = threshold
+        self.board = None
+        # 最近一帧中交给回退函数识别的格子数
+        self.fallbacks = 0
+        self._samples = None
+        # 回退函数没有给出合法数值的格子，像素不变也在下一帧重新识别
+        self._unresolved = set()
+
+    def reset(self):
+        """丢弃上一帧（例如重新选择了游戏区域）"""
+        self.board = None
+        self._samples = None
+        self._unresolved = set()
+
+    def update(self, image, fallback=None):
+        """识别新的一帧，返回 (4x4数值列表, 重新识别的格子编号列表)
+
+        颜色无法判断、回退函数也没有识出合法方块数值的格子（OCR失败时为0）
+        不认为已经识别完成，下一帧即使像素不变也重新识别。
+        """
+        samples = _samples(image)
+        if self._samples is None or self._samples.shape != samples.shape:
+            changed = list(range(16))
+            values = [0] * 16
+        else:
+            differences = cell_differences(self._samples, samples)
+            changed = sorted(set(np.flatnonzero(differences > self.threshold).tolist())
+                             | self._unresolved)
+            values = [value for row in self.board for value in row]
+
+        self.fallbacks = 0
+        if changed:
+            new_values, fallback_cells = self.classifier.recognize_cells(image, changed, fallback)
+            for k, value in zip(changed, new_values):
+                values[k] = value
+            self.fallbacks = len(fallback_cells)
+            self._unresolved = {k for k in fallback_cells if not is_tile_value(values[k])}
+        self._samples = samples
+        self.board = [values[i * 4:i * 4 + 4] for i in range(4)]
+        return self.board, changed
+
+
+def wait_until_settled(grab, reference=None, timeout=1.0, interval=0.02,
+                       threshold=CHANGE_THRESHOLD, stable_frames=2):
+    """反复调用 grab() 截图，直到画面稳定，返回 (最后一帧, 是否已稳定)
+
+    给出 reference（移动前的一帧）时先等待画面与它不同，确认移动已经生效；
+    之后连续 stable_frames 帧没有格子变化即认为动画结束。超时时返回最后一帧。
+    """
+    require_numpy()
+    deadline = time.perf_counter() + timeout
+    frame = grab()
+    samples = _samples(frame)
+    changed = reference is None
+    if not changed:
+        changed = (cell_differences(_samples(reference), samples) > threshold).any()
+    still = 0
+    while time.perf_counter() < deadline:
+        time.sleep(interval)
+        next_frame = grab()
+        next_samples = _samples(next_frame)
+        moving = (cell_differences(samples, next_samples) > threshold).any()
+        frame, samples = next_frame, next_samples
+        if moving:
+            changed = True
+            still = 0
+        elif changed:
+            still += 1
+            if still >= stable_frames:
+                return frame, True
+        elif reference is not None and (
+                cell_differences(_samples(reference), samples) > threshold).any():
+            changed = True
+    return frame, False
@@ -0,0 +1,108 @@
+"""
+方块字形缓存
+
+OCR识别过的格子图像按感知哈希保存：格子按自身最亮和最暗的中点二值化，像素较少的
+一侧视为数字笔画（深色字和浅色字都适用），把笔画的外接矩形缩放成16x16得到256位哈希，
+与数字在格子中的位置和大小无关。同一方块在不同帧中的像素即使略有差异，哈希也只相差
+少数几位，因此先查完全相同的哈希，再在汉明距离 max_distance 以内找最近的一个。
+缓存保存在本地数据目录中，下次启动继续使用。
+"""
+
+import json
+import os
+
+from engine2048.paths import data_path
+
+from .classifier import grayscale, is_tile_value, require_numpy
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+GLYPH_FILE = 'glyph_cache_v1.json'
+
+# 哈希的边长（位数为其平方）
+HASH_SIZE = 16
+
+# 格子内最亮与最暗之差小于该值时认为没有数字
+MIN_CONTRAST = 32
+
+
+def glyph_hash(cell):
+    """格子图像（H x W x 3）的感知哈希，返回整数；没有数字笔画时返回0"""
+    require_numpy()
+    gray = grayscale(cell)
+    low = gray.min()
+    high = gray.max()
+    if high - low < MIN_CONTRAST:
+        return 0
+    ink = gray < (low + high) / 2
+    if ink.sum() * 2 > ink.size:
+        ink = ~ink
+
+    # 笔画的外接矩形，按最近邻采样缩放到 HASH_SIZE x HASH_SIZE
+    rows = np.flatnonzero(ink.any(axis=1))
+    cols = np.flatnonzero(ink.any(axis=0))
+    ys = np.linspace(rows[0], rows[-1], HASH_SIZE).round().astype(int)
+    xs = np.linspace(cols[0], cols[-1], HASH_SIZE).round().astype(int)
+    bits = ink[np.ix_(ys, xs)].ravel()
+    return int(''.join('1' if bit else '0' for bit in bits), 2)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class GlyphCache:
+    """感知哈希 -> 方块数值 的持久缓存"""
+
+    def __init__(self, path=None, max_distance=12):
+        self.path = path or data_path(GLYPH_FILE)
+        self.max_distance = max_distance
+        self.hits = 0
+        self.misses = 0
+        self._glyphs = {}
+        self.load()
+
+    def load(self):
+        """从磁盘加载（文件不存在或损坏时从空缓存开始）"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            self._glyphs = {int(key, 16): value for key, value in data.items() if is_tile_value(value)}
+        except (OSError, ValueError, AttributeError):
+            self._glyphs = {}
+
+    def save(self):
+        """写入磁盘（先写临时文件再替换，避免中途退出留下损坏的文件）"""
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({f'{key:x}': value for key, value in self._glyphs.items()}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"无法保存字形缓存: {e}")
+
+    def lookup(self, key):
+        """按哈希查找数值：先查完全相同的哈希，再找距离最近的，找不到时返回None"""
+        value = self._glyphs.get(key)
+        if value is None and self._glyphs:
+            nearest = min(self._glyphs, key=lambda known: hamming(known, key))
+            if hamming(nearest, key) <= self.max_distance:
+                value = self._glyphs[nearest]
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def add(self, key, value, save=True):
+        """记录一个识别结果（只记录合法的方块数值）"""
+        if is_tile_value(value) and self._glyphs.get(key) != value:
+            self._glyphs[key] = value
+            if save:
+                self.save()
+
+    def __len__(self):
+        return len(self._glyphs)